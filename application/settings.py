@@ -56,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so session and auth queries are counted too; inert unless QUERY_COUNT_HEADER
+    'restapi.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -105,6 +107,24 @@ if 'VERCEL' in os.environ or os.environ.get('DATABASE_URL'):
     if db_from_env:
         DATABASES['default'] = db_from_env
 
+# The cache holds state every process must agree on (autosave buffers,
+# admission buckets, throttles), so deployments keep it in the shared
+# database; run `manage.py createcachetable` after migrating. A single local
+# runserver process is fine with memory.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if 'VERCEL' in os.environ or os.environ.get('DATABASE_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        # Culling past MAX_ENTRIES would drop autosave buffers, so keep it well above a sitting's attempts
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -145,6 +165,11 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_RATES': {
+        # Public certificate verification, per client IP
+        'certificate_verify': os.environ.get('CERTIFICATE_VERIFY_RATE', '30/min'),
+        'certificate_bulk_verify': os.environ.get('CERTIFICATE_BULK_VERIFY_RATE', '60/hour'),
+    },
 }
 
 # Static files (CSS, JavaScript, Images)
@@ -160,3 +185,37 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 # Keep primary key type stable for this project/database.
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
+# Exam answer autosave: buffered answers are written to the database at most
+# once per this many seconds per attempt.
+EXAM_AUTOSAVE_FLUSH_SECONDS = int(os.environ.get('EXAM_AUTOSAVE_FLUSH_SECONDS', '10'))
+
+# Scheduled exams: caches are prewarmed, and admission control applies, from
+# this many minutes before the sitting opens.
+EXAM_PREWARM_LEAD_MINUTES = int(os.environ.get('EXAM_PREWARM_LEAD_MINUTES', '10'))
+
+# Store submitted exam answers as option indexes in question order instead of
+# full text (see restapi/answer_codec.py). Reading handles both formats;
+# `manage.py compact_answers` converts attempts stored before the switch.
+EXAM_COMPACT_ANSWERS = os.environ.get('EXAM_COMPACT_ANSWERS', 'True') == 'True'
+
+# Certificate tokens (restapi/certificate_signing.py): HMAC secrets by key id,
+# given as "k2:secret,k1:old-secret". New tokens are signed with
+# CERTIFICATE_SIGNING_KEY_ID; keep retired keys listed so certificates signed
+# with them still verify.
+CERTIFICATE_SIGNING_KEYS = dict(
+    pair.split(':', 1) for pair in os.environ.get('CERTIFICATE_SIGNING_KEYS', '').split(',') if ':' in pair
+) or {'k1': SECRET_KEY}
+CERTIFICATE_SIGNING_KEY_ID = os.environ.get('CERTIFICATE_SIGNING_KEY_ID', next(iter(CERTIFICATE_SIGNING_KEYS)))
+# Printed on certificates as the base of their verify link
+CERTIFICATE_VERIFY_BASE_URL = os.environ.get('CERTIFICATE_VERIFY_BASE_URL', 'http://localhost:8000')
+
+# Background jobs (restapi/jobs.py) are queued for `manage.py run_jobs`, so
+# certificates, activity logs and points stay out of request latency. The
+# Vercel deployment has no worker, so there they run in the request once it
+# commits instead; JOBS_ALWAYS_EAGER overrides either default.
+JOBS_ALWAYS_EAGER = os.environ.get('JOBS_ALWAYS_EAGER', str('VERCEL' in os.environ)) == 'True'
+
+# Add an X-Query-Count header to every response (restapi/middleware.py), for
+# load tests and profiling. Off unless asked for, whatever DEBUG is.
+QUERY_COUNT_HEADER = os.environ.get('QUERY_COUNT_HEADER', 'False') == 'True'
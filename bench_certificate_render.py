@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark certificate PDF rendering.
+
+Times the stamped renderer in restapi.certificate_pdf, which reuses a static
+frame of prebuilt styles, fixed paragraphs and line positions, against the
+platypus document the download view used to build from scratch on every
+request.
+Rendering only: no database, no disk cache.
+
+Usage: python bench_certificate_render.py [--renders 300]
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import date
+from io import BytesIO
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+django.setup()
+
+from restapi.certificate_pdf import render_certificate_pdf, static_layer
+from restapi.certificate_signing import sign_claims
+
+
+def render_from_scratch(fields):
+    """The pre-stamping renderer: styles, story and document rebuilt for every certificate."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.enums import TA_CENTER
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = [Spacer(1, 1.5*inch)]
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=48, textColor='#8B4513',
+                                 spaceAfter=30, alignment=TA_CENTER, fontName='Helvetica-Bold')
+    story.append(Paragraph("Certificate of Completion", title_style))
+    story.append(Spacer(1, 0.5*inch))
+    body_style = ParagraphStyle('CustomBody', parent=styles['Normal'], fontSize=14, alignment=TA_CENTER, spaceAfter=12)
+    story.append(Paragraph("This is to certify that", body_style))
+    story.append(Spacer(1, 0.2*inch))
+    name_style = ParagraphStyle('CustomName', parent=styles['Heading2'], fontSize=24, textColor='#8B4513',
+                                alignment=TA_CENTER, spaceAfter=12, fontName='Helvetica-Bold')
+    story.append(Paragraph(fields['name'], name_style))
+    story.append(Spacer(1, 0.3*inch))
+    story.append(Paragraph("has successfully completed the examination", body_style))
+    story.append(Spacer(1, 0.1*inch))
+    exam_style = ParagraphStyle('CustomExam', parent=styles['Heading3'], fontSize=16, alignment=TA_CENTER, spaceAfter=12)
+    story.append(Paragraph(f"<b>{fields['title']}</b>", exam_style))
+    story.append(Spacer(1, 0.2*inch))
+    if fields['institution']:
+        story.append(Paragraph(f"from <b>{fields['institution']}</b>", body_style))
+        story.append(Spacer(1, 0.1*inch))
+    if fields['score'] is not None:
+        story.append(Paragraph(f"with a score of <b>{fields['score']}%</b>", body_style))
+        story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph("In recognition of the achievement and competency demonstrated", body_style))
+    story.append(Spacer(1, 0.5*inch))
+    details_style = ParagraphStyle('CustomDetails', parent=styles['Normal'], fontSize=10, alignment=TA_CENTER,
+                                   spaceAfter=6, textColor='#666666')
+    story.append(Paragraph(f"Certificate No.: {fields['number']}", details_style))
+    story.append(Paragraph(f"Issued: {fields['issued']}", details_style))
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def sample_fields(i):
+    fields = {
+        'name': f"Student Number {i}",
+        'title': "Python Fundamentals Certification",
+        'institution': "TaskCert Platform",
+        'score': 60 + i % 40,
+        'number': f"CERT-{i:010X}",
+        'issued': "March 14, 2026",
+    }
+    fields['token'] = sign_claims(fields['number'], fields['name'], fields['title'], fields['score'], date(2026, 3, 14))
+    return fields
+
+
+def measure(render, renders):
+    timings = []
+    for i in range(renders):
+        fields = sample_fields(i)
+        started = time.perf_counter()
+        render(fields)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--renders', type=int, default=300)
+    args = parser.parse_args()
+
+    # Warm both paths so imports and the one-off static layer are not timed
+    static_layer()
+    render_certificate_pdf(sample_fields(0))
+    render_from_scratch(sample_fields(0))
+
+    results = {
+        'from scratch': measure(render_from_scratch, args.renders),
+        'stamped': measure(render_certificate_pdf, args.renders),
+    }
+    print(f"{args.renders} renders each")
+    print(f"{'renderer':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'renders/s':>12}")
+    for name, timings in results.items():
+        ordered = sorted(timings)
+        mean = statistics.mean(timings)
+        print(f"{name:<14}{mean:>10.2f}{ordered[len(ordered) // 2]:>10.2f}"
+              f"{ordered[int(len(ordered) * 0.95) - 1]:>10.2f}{1000 / mean:>12.1f}")
+    speedup = statistics.mean(results['from scratch']) / statistics.mean(results['stamped'])
+    print(f"stamped renders are {speedup:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
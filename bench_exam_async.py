@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+"""
+Compare sync (WSGI) and async (ASGI) throughput of the exam flow.
+
+Every simulated student starts an exam, polls its status once and submits it,
+first against /api/results/ through Django's WSGI handler on a thread pool,
+then against /api/async/results/ through the ASGI handler on one event loop.
+Both run in-process against a throwaway test database, so the numbers
+measure the request stack and the database, not a network.
+
+SQLite serialises writers and the async ORM funnels queries through a single
+thread, so point DATABASE_URL at Postgres for numbers that mean anything.
+
+Usage: python bench_exam_async.py [--students 100] [--concurrency 20] [--questions 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+django.setup()
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+
+from restapi.models import CustomUser, Exam, Mentor, Question
+
+
+class Timings:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.flows = 0
+        self.elapsed = 0.0
+
+    def record(self, started, response, expected=200):
+        self.latencies.append(time.perf_counter() - started)
+        if response.status_code != expected:
+            self.errors += 1
+        return response
+
+    def report(self):
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return f"{self.name}: no requests"
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return (
+            f"{self.name:<6} {self.flows} flows, {len(latencies)} requests in {self.elapsed:.2f}s: "
+            f"{self.flows / self.elapsed:.1f} flows/s, {len(latencies) / self.elapsed:.1f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, "
+            f"{self.errors} errors"
+        )
+
+
+def seed(name, students, questions):
+    mentor = Mentor.objects.create(name=f'Bench {name}', email=f'bench-{name}@example.com')
+    exam = Exam.objects.create(
+        name=f'Bench {name}', created_by=mentor, duration_minutes=60, pass_score=50, max_attempts=0
+    )
+    Question.objects.bulk_create([
+        Question(
+            exam=exam, question_text=f'Question {i}', question_type='multiple_choice',
+            options=['A', 'B', 'C', 'D'], correct_answer='A',
+        )
+        for i in range(questions)
+    ])
+    # One hash for everyone; hashing per user would dominate the setup time
+    password = make_password('bench')
+    CustomUser.objects.bulk_create([
+        CustomUser(
+            username=f'bench-{name}-{i}', password=password, role='user',
+            certificate_id=f'B{name[0].upper()}{i:07d}',
+        )
+        for i in range(students)
+    ])
+    return exam, list(CustomUser.objects.filter(username__startswith=f'bench-{name}-'))
+
+
+def run_sync(exam, users, concurrency):
+    timings = Timings('wsgi')
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+
+    def flow(client):
+        try:
+            started = time.perf_counter()
+            r = timings.record(started, client.post(
+                '/api/results/start_exam/', {'exam_id': exam.id}, content_type='application/json'
+            ))
+            if r.status_code != 200:
+                return
+            attempt = r.json()
+            started = time.perf_counter()
+            timings.record(started, client.get(
+                '/api/results/attempt_status/', {'attempt_id': attempt['attempt_id']}
+            ))
+            answers = {str(q['id']): q['options'][0] for q in attempt['questions']}
+            started = time.perf_counter()
+            timings.record(started, client.post(
+                '/api/results/submit_exam/',
+                {'attempt_id': attempt['attempt_id'], 'answers': answers},
+                content_type='application/json',
+            ))
+            timings.flows += 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(flow, clients))
+    timings.elapsed = time.perf_counter() - started
+    return timings
+
+
+async def run_async(exam, users, concurrency):
+    timings = Timings('asgi')
+    clients = []
+    for user in users:
+        client = AsyncClient()
+        await client.aforce_login(user)
+        clients.append(client)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def flow(client):
+        async with gate:
+            started = time.perf_counter()
+            r = timings.record(started, await client.post(
+                '/api/async/results/start_exam/', {'exam_id': exam.id}, content_type='application/json'
+            ))
+            if r.status_code != 200:
+                return
+            attempt = r.json()
+            started = time.perf_counter()
+            timings.record(started, await client.get(
+                '/api/async/results/attempt_status/', {'attempt_id': attempt['attempt_id']}
+            ))
+            answers = {str(q['id']): q['options'][0] for q in attempt['questions']}
+            started = time.perf_counter()
+            timings.record(started, await client.post(
+                '/api/async/results/submit_exam/',
+                {'attempt_id': attempt['attempt_id'], 'answers': answers},
+                content_type='application/json',
+            ))
+            timings.flows += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(flow(client) for client in clients))
+    timings.elapsed = time.perf_counter() - started
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--questions', type=int, default=20)
+    args = parser.parse_args()
+
+    if connection.vendor == 'sqlite':
+        # The shared in-memory test database locks whole tables under concurrent
+        # writers; a file database with a busy timeout just queues them
+        connection.settings_dict['TEST']['NAME'] = 'bench_exam.sqlite3'
+        connection.settings_dict['OPTIONS'].setdefault('timeout', 30)
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        sync_exam, sync_users = seed('sync', args.students, args.questions)
+        async_exam, async_users = seed('async', args.students, args.questions)
+
+        print(f"{args.students} students, {args.questions} questions, concurrency {args.concurrency} "
+              f"({connection.vendor})")
+        print(run_sync(sync_exam, sync_users, args.concurrency).report())
+        print(asyncio.run(run_async(async_exam, async_users, args.concurrency)).report())
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+"""
+Exam-day load test: many students logging in, starting, answering and
+submitting one exam at the same time against a running server.
+
+    python manage.py runserver              # or gunicorn / uvicorn, QUERY_COUNT_HEADER=True for query counts
+    python loadtest_exam.py --seed --users 1000
+    python loadtest_exam.py --users 1000 --concurrency 100 --save-baseline baseline.json
+    python loadtest_exam.py --users 1000 --concurrency 100 --compare baseline.json
+
+--seed creates the load-test students and exam in the database configured for
+this project, so run it against the same database as the server. Flows use
+plain HTTP with a cookie jar per student; --mode process spreads them over
+processes when a single client process becomes the bottleneck. Per-endpoint
+query counts come from the X-Query-Count header added by
+restapi.middleware.QueryCountMiddleware, which is only active with
+QUERY_COUNT_HEADER on.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+USERNAME_PREFIX = 'loadtest-'
+PASSWORD = 'loadtest-password'
+EXAM_NAME = 'Load Test Exam'
+ENDPOINTS = ['login', 'start_exam', 'autosave', 'submit_exam']
+
+
+def seed(users, questions):
+    """Create the exam and any missing students; returns the exam id."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    import django
+    django.setup()
+    from django.contrib.auth.hashers import make_password
+    from restapi.models import CustomUser, Exam, Mentor, Question
+
+    mentor, _ = Mentor.objects.get_or_create(email='loadtest@example.com', defaults={'name': 'Load Test'})
+    exam, created = Exam.objects.get_or_create(
+        name=EXAM_NAME,
+        created_by=mentor,
+        defaults={'duration_minutes': 60, 'pass_score': 50, 'max_attempts': 0},
+    )
+    if created:
+        Question.objects.bulk_create([
+            Question(
+                exam=exam, question_text=f'Load test question {i + 1}', question_type='multiple_choice',
+                options=['A', 'B', 'C', 'D'], correct_answer='A',
+            )
+            for i in range(questions)
+        ])
+
+    existing = set(CustomUser.objects.filter(username__startswith=USERNAME_PREFIX).values_list('username', flat=True))
+    # Hash once; a PBKDF2 round per student would dominate seeding
+    password = make_password(PASSWORD)
+    CustomUser.objects.bulk_create([
+        CustomUser(username=f'{USERNAME_PREFIX}{i}', password=password, role='user', certificate_id=f'LT{i:08d}')
+        for i in range(users)
+        if f'{USERNAME_PREFIX}{i}' not in existing
+    ])
+    return exam.id
+
+
+def seeded_exam_id():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    import django
+    django.setup()
+    from restapi.models import Exam
+
+    exam = Exam.objects.filter(name=EXAM_NAME).order_by('id').first()
+    if exam is None:
+        sys.exit('No load-test exam found; run with --seed first or pass --exam.')
+    return exam.id
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Session:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def csrf_token(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def request(self, method, path, data=None, form=False):
+        headers = {'X-CSRFToken': self.csrf_token(), 'Referer': self.base_url + '/'}
+        body = None
+        if data is not None and form:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+
+def run_flow(task):
+    """
+    One student's login -> start -> autosave -> submit. Returns a list of
+    (endpoint, seconds, status, queries, error) samples. Must stay free of
+    Django imports so process workers start cheaply.
+    """
+    base_url, username, exam_id, api_prefix, timeout, rng_seed = task
+    rng = random.Random(rng_seed)
+    session = Session(base_url, timeout)
+    samples = []
+
+    def timed(endpoint, method, path, data=None, form=False, ok=(200,)):
+        started = time.perf_counter()
+        try:
+            status, headers, body = session.request(method, path, data, form)
+        except Exception as e:  # connection refused, timeouts, resets
+            samples.append((endpoint, time.perf_counter() - started, 0, None, type(e).__name__))
+            return None
+        queries = headers.get('X-Query-Count')
+        error = None if status in ok else f'HTTP {status}'
+        samples.append((endpoint, time.perf_counter() - started, status, int(queries) if queries else None, error))
+        if error:
+            return None
+        try:
+            return json.loads(body) if body else {}
+        except ValueError:
+            return {}
+
+    # The login page sets the CSRF cookie; a successful login redirects
+    session.request('GET', '/login/')
+    if timed('login', 'POST', '/login/', {
+        'username': username, 'password': PASSWORD, 'role': 'student',
+        'csrfmiddlewaretoken': session.csrf_token(),
+    }, form=True, ok=(302,)) is None:
+        return samples
+
+    attempt = timed('start_exam', 'POST', f'{api_prefix}/start_exam/', {'exam_id': exam_id})
+    if not attempt:
+        return samples
+
+    answers = {str(q['id']): rng.choice(q['options']) for q in attempt['questions'] if q['options']}
+    first_half = dict(list(answers.items())[:len(answers) // 2])
+    timed('autosave', 'PATCH', '/api/results/autosave/', {'attempt_id': attempt['attempt_id'], 'answers': first_half})
+    timed('submit_exam', 'POST', f'{api_prefix}/submit_exam/', {'attempt_id': attempt['attempt_id'], 'answers': answers})
+    return samples
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, elapsed, flows):
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+
+    endpoints = {}
+    for name in ENDPOINTS:
+        rows = by_endpoint.get(name)
+        if not rows:
+            continue
+        latencies = sorted(s[1] * 1000 for s in rows)
+        queries = [s[3] for s in rows if s[3] is not None]
+        errors = [s[4] for s in rows if s[4]]
+        endpoints[name] = {
+            'count': len(rows),
+            'errors': len(errors),
+            'error_rate': len(errors) / len(rows),
+            'error_kinds': {kind: errors.count(kind) for kind in sorted(set(errors))},
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'queries_avg': sum(queries) / len(queries) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+    return {
+        'flows': flows,
+        'elapsed_s': elapsed,
+        'flows_per_s': flows / elapsed if elapsed else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def _fmt_queries(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def print_report(summary):
+    print(f"{summary['flows']} flows in {summary['elapsed_s']:.2f}s ({summary['flows_per_s']:.1f} flows/s)")
+    print(f"{'endpoint':<12} {'count':>6} {'err%':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for name, row in summary['endpoints'].items():
+        print(
+            f"{name:<12} {row['count']:>6} {row['error_rate'] * 100:>6.1f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {_fmt_queries(row['queries_avg']):>8}"
+        )
+        if row['error_kinds']:
+            print(f"{'':<12} errors: {', '.join(f'{k} x{v}' for k, v in row['error_kinds'].items())}")
+
+
+def _delta(new, old):
+    if new is None or old is None:
+        return '-'
+    if not old:
+        return f'{new - old:+.1f}'
+    return f'{(new - old) * 100 / old:+.0f}%'
+
+
+def print_comparison(summary, baseline):
+    print(f"\nvs baseline ({baseline['flows']} flows, {baseline['flows_per_s']:.1f} flows/s): "
+          f"throughput {_delta(summary['flows_per_s'], baseline['flows_per_s'])}")
+    print(f"{'endpoint':<12} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>8} {'queries':>8}")
+    for name, row in summary['endpoints'].items():
+        old = baseline['endpoints'].get(name)
+        if not old:
+            print(f"{name:<12} (not in baseline)")
+            continue
+        print(
+            f"{name:<12} {_delta(row['p50_ms'], old['p50_ms']):>8} {_delta(row['p95_ms'], old['p95_ms']):>8} "
+            f"{_delta(row['p99_ms'], old['p99_ms']):>8} "
+            f"{(row['error_rate'] - old['error_rate']) * 100:>+8.1f} "
+            f"{_delta(row['queries_avg'], old['queries_avg']):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exam-day load test against a running server.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=100, help='Number of simulated students')
+    parser.add_argument('--questions', type=int, default=20, help='Questions in the seeded exam')
+    parser.add_argument('--concurrency', type=int, default=20, help='Flows in flight at once')
+    parser.add_argument('--mode', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--api', choices=['sync', 'async'], default='sync',
+                        help='Use /api/results/ or the ASGI /api/async/results/ endpoints')
+    parser.add_argument('--exam', type=int, help='Exam id (defaults to the seeded load-test exam)')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', action='store_true', help='Create the students and exam first')
+    parser.add_argument('--seed-only', action='store_true', help='Seed and exit without running')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write this run as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='Compare this run against a saved baseline')
+    args = parser.parse_args()
+
+    exam_id = args.exam
+    if args.seed or args.seed_only:
+        seeded = seed(args.users, args.questions)
+        exam_id = exam_id or seeded
+        if args.seed_only:
+            print(f"Seeded {args.users} students for exam {exam_id}")
+            return
+    elif exam_id is None:
+        exam_id = seeded_exam_id()
+
+    api_prefix = '/api/async/results' if args.api == 'async' else '/api/results'
+    tasks = [
+        (args.base_url, f'{USERNAME_PREFIX}{i}', exam_id, api_prefix, args.timeout, i)
+        for i in range(args.users)
+    ]
+    executor_class = ProcessPoolExecutor if args.mode == 'process' else ThreadPoolExecutor
+
+    print(f"{args.users} students, concurrency {args.concurrency} ({args.mode} pool), "
+          f"exam {exam_id}, {args.api} API at {args.base_url}")
+    started = time.perf_counter()
+    samples = []
+    with executor_class(max_workers=args.concurrency) as pool:
+        for flow_samples in pool.map(run_flow, tasks, chunksize=1 if args.mode == 'thread' else 4):
+            samples.extend(flow_samples)
+    elapsed = time.perf_counter() - started
+
+    flows = sum(1 for s in samples if s[0] == 'submit_exam' and not s[4])
+    summary = summarize(samples, elapsed, flows)
+    summary['config'] = {k: getattr(args, k) for k in ('users', 'concurrency', 'mode', 'api', 'base_url')}
+    print_report(summary)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(summary, json.load(f))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,15 @@
-from django.contrib import admin
+import json
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from .models import Mentor, Task, Submission, Exam, Question, Result, Certificate, CustomUser, Topic, SampleQuestion, ExamAttempt
+from .models import Mentor, Task, Submission, Exam, Question, Result, Certificate, CustomUser, Topic, SampleQuestion, ExamAttempt, ExamAttemptStats, ProctoringEvent, QuestionStats
+from .regrade import regrade_exam
+from .question_pack import attempt_answers
+from .provisioning import exam_roster, provision_attempts
+from .verification import revoke_certificates
 
 User = get_user_model()
 
@@ -114,16 +119,65 @@ class SubmissionAdmin(admin.ModelAdmin):
 
 @admin.register(Exam)
 class ExamAdmin(admin.ModelAdmin):
-    list_display = ('name', 'created_by', 'assigned_to', 'due_date', 'duration_minutes', 'pass_score', 'max_attempts')
+    list_display = ('name', 'created_by', 'assigned_to', 'due_date', 'scheduled_start', 'duration_minutes', 'pass_score', 'max_attempts')
     search_fields = ('name', 'created_by__name', 'assigned_to__username')
     list_filter = ('created_by', 'assigned_to', 'due_date')
-
+    actions = ['regrade_attempts', 'provision_roster_attempts']
+
+    @admin.action(description='Regrade submitted attempts')
+    def regrade_attempts(self, request, queryset):
+        for exam in queryset:
+            stats = regrade_exam(exam)
+            self.message_user(request, f"{exam.name}: {stats}")
+
+    @admin.action(description='Provision attempts for the exam roster')
+    def provision_roster_attempts(self, request, queryset):
+        for exam in queryset:
+            try:
+                created, skipped = provision_attempts(exam, exam_roster(exam).values_list('id', flat=True))
+            except ValueError as exc:
+                self.message_user(request, f"{exam.name}: {exc}", level=messages.ERROR)
+                continue
+            reasons = ', '.join(f"{n} {reason.replace('_', ' ')}" for reason, n in sorted(skipped.items()))
+            self.message_user(
+                request,
+                f"{exam.name}: {created} attempts provisioned, {sum(skipped.values())} users skipped"
+                + (f" ({reasons})" if reasons else ''),
+            )
+
+
+class ProctoringEventInline(admin.TabularInline):
+    """Read-only violation timeline; rows come from the (attempt, occurred_at) index."""
+    model = ProctoringEvent
+    fields = ('occurred_at', 'event_type', 'warning_count')
+    readonly_fields = fields
+    ordering = ('occurred_at',)
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 @admin.register(ExamAttempt)
 class ExamAttemptAdmin(admin.ModelAdmin):
     list_display = ('user', 'exam', 'attempt_number', 'status', 'score', 'passed', 'started_at', 'submitted_at', 'expires_at')
     list_filter = ('status', 'passed', 'exam')
     search_fields = ('user__username', 'exam__name')
+    readonly_fields = ('decoded_answers',)
+    inlines = [ProctoringEventInline]
+
+    @admin.display(description='Answers (decoded)')
+    def decoded_answers(self, obj):
+        if not obj.pk:
+            return '-'
+        return json.dumps(attempt_answers(obj), ensure_ascii=False)
+
+@admin.register(ExamAttemptStats)
+class ExamAttemptStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'exam', 'attempts_used', 'best_score', 'last_score', 'passed', 'updated_at')
+    list_filter = ('passed', 'exam')
+    search_fields = ('user__username', 'exam__name')
+    raw_id_fields = ('user', 'exam', 'last_attempt')
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
@@ -131,6 +185,13 @@ class QuestionAdmin(admin.ModelAdmin):
     list_filter = ('question_type', 'exam')
     search_fields = ('question_text', 'exam__name')
 
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(admin.ModelAdmin):
+    list_display = ('question', 'times_shown', 'times_answered', 'times_correct', 'updated_at')
+    list_filter = ('question__exam',)
+    search_fields = ('question__question_text', 'question__exam__name')
+    raw_id_fields = ('question',)
+
 @admin.register(Result)
 class ResultAdmin(admin.ModelAdmin):
     list_display = ('user', 'exam', 'score', 'passed', 'taken_at')
@@ -139,10 +200,17 @@ class ResultAdmin(admin.ModelAdmin):
 
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
-    list_display = ('user', 'exam', 'certificate_number', 'name', 'institution', 'score', 'issued_date')
+    list_display = ('user', 'exam', 'certificate_number', 'name', 'institution', 'score', 'flagged', 'revoked', 'issued_date')
     search_fields = ('user__username', 'exam__name', 'certificate_number', 'name')
-    list_filter = ('issued_date', 'exam')
-    fields = ('user', 'exam', 'certificate_number', 'name', 'institution', 'score')
+    list_filter = ('flagged', 'revoked', 'issued_date', 'exam')
+    fields = ('user', 'exam', 'certificate_number', 'name', 'institution', 'score', 'flagged', 'revoked', 'revoked_at')
+    readonly_fields = ('revoked_at',)
+    actions = ['revoke']
+
+    @admin.action(description='Revoke selected certificates')
+    def revoke(self, request, queryset):
+        count = revoke_certificates(queryset)
+        self.message_user(request, f"{count} certificates revoked")
 
 @admin.register(Topic)
 class TopicAdmin(admin.ModelAdmin):
@@ -0,0 +1,74 @@
+import math
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Exam
+from .question_pack import get_question_pack, get_answer_key
+
+# Caches are warmed this long before a scheduled sitting opens, and admission
+# control is already enforced from that point on.
+PREWARM_LEAD = timedelta(minutes=getattr(settings, 'EXAM_PREWARM_LEAD_MINUTES', 10))
+
+
+class Admission:
+    def __init__(self, admitted, retry_after=0, queue_position=0):
+        self.admitted = admitted
+        self.retry_after = retry_after
+        self.queue_position = queue_position
+
+
+def admission_window_open(exam, now=None):
+    if not exam.scheduled_start or not exam.admission_rate:
+        return False
+    now = now or timezone.now()
+    closes = exam.scheduled_start + timedelta(minutes=int(exam.duration_minutes or 0))
+    return exam.scheduled_start - PREWARM_LEAD <= now <= closes
+
+
+def admit_start(exam, now=None):
+    """
+    Token bucket for exam starts during a scheduled window. Refused requests
+    get a queue position for the current second and a matching Retry-After.
+    The bucket is read and written without a lock, so under heavy contention
+    it can over-admit slightly; it is a load shedder, not an exact quota.
+
+    The bucket lives in the default cache, so the rate is per cache: shared
+    by every process in deployments (a DatabaseCache, see CACHES in
+    settings), but per process with the local LocMemCache, where each
+    process admits up to the full rate on its own.
+    """
+    if not admission_window_open(exam, now):
+        return Admission(True)
+
+    rate = float(exam.admission_rate)
+    burst = float(exam.admission_burst or exam.admission_rate)
+    key = f"exam:{exam.id}:bucket"
+    clock = time.time()
+
+    tokens, updated = cache.get(key, (burst, clock))
+    tokens = min(burst, tokens + (clock - updated) * rate)
+    if tokens >= 1:
+        cache.set(key, (tokens - 1, clock), 60)
+        return Admission(True)
+    cache.set(key, (tokens, clock), 60)
+
+    queue_key = f"exam:{exam.id}:queue:{int(clock)}"
+    cache.add(queue_key, 0, 5)
+    try:
+        position = cache.incr(queue_key)
+    except ValueError:
+        position = 1
+    return Admission(False, retry_after=max(1, math.ceil(position / rate)), queue_position=position)
+
+
+def prewarm_exam(exam):
+    """Build the question pack and answer key ahead of a sitting."""
+    get_question_pack(exam.id, exam.pack_version)
+    get_answer_key(exam.id, exam.pack_version)
+
+
+def exams_due_for_prewarm(now=None):
+    now = now or timezone.now()
+    return Exam.objects.filter(scheduled_start__gte=now - PREWARM_LEAD, scheduled_start__lte=now + PREWARM_LEAD)
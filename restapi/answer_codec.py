@@ -0,0 +1,113 @@
+"""
+Compact storage format for ExamAttempt.answers.
+
+Plain answers are {"<question id>": "<answer text>"}. The compact form is
+
+    {"_v": 1, "r": [[first_id, last_id], ...], "c": [2, 0, -1, ...], "t": {"<id>": "text"}, "s": "<digest>"}
+
+where "r" is the set of question ids the attempt was encoded against as
+inclusive id ranges, "c" holds one option index per question in the
+attempt's presented order of those ids (-1 for no option), and "t" keeps
+the full text of answers that are not one of the question's options, such
+as short answers. "s" is the digest of the options the indexes point into,
+as they were when the answers were encoded. The options themselves are
+stored once per digest (AnswerOptionSnapshot), so decoding reads that
+snapshot, and later edits or reordering of a question's options never
+change a stored answer.
+
+Everything here is pure: callers supply the presented order and each
+question's option list, and store the snapshot.
+"""
+import hashlib
+import json
+
+VERSION = 1
+
+
+def is_compact(stored):
+    return isinstance(stored, dict) and stored.get('_v') == VERSION
+
+
+def pack_ranges(ids):
+    """Sorted ids as inclusive [first, last] runs; exam question ids are mostly consecutive."""
+    ranges = []
+    for qid in sorted(set(ids)):
+        if ranges and qid == ranges[-1][1] + 1:
+            ranges[-1][1] = qid
+        else:
+            ranges.append([qid, qid])
+    return ranges
+
+
+def unpack_ranges(ranges):
+    ids = []
+    for first, last in ranges or []:
+        ids.extend(range(first, last + 1))
+    return ids
+
+
+def options_snapshot(question_ids, options_by_id):
+    """The options of the given questions, as stored in a snapshot: {str id: [option, ...]}."""
+    return {str(qid): list(options_by_id.get(qid) or []) for qid in question_ids}
+
+
+def snapshot_digest(snapshot):
+    payload = json.dumps(snapshot, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def snapshot_options(snapshot):
+    """A stored snapshot back as the options_by_id decode_answers expects."""
+    return {int(qid): options for qid, options in snapshot.items()}
+
+
+def encode_answers(answers, question_ids, options_by_id):
+    """
+    answers: {question id (str or int): answer text}.
+    question_ids: the attempt's presented order.
+    options_by_id: {question id: [option, ...]}.
+    The caller stores options_snapshot(question_ids, options_by_id) under
+    the returned value's "s".
+    """
+    answers = {str(k): v for k, v in (answers or {}).items()}
+    codes = []
+    text = {}
+    for qid in question_ids:
+        value = answers.pop(str(qid), None)
+        options = options_by_id.get(qid) or []
+        if value is not None and value in options:
+            codes.append(options.index(value))
+            continue
+        codes.append(-1)
+        if value is not None:
+            text[str(qid)] = value
+    # Answers to questions outside the order are kept verbatim rather than lost
+    text.update(answers)
+    snapshot = options_snapshot(question_ids, options_by_id)
+    return {'_v': VERSION, 'r': pack_ranges(question_ids), 'c': codes, 't': text, 's': snapshot_digest(snapshot)}
+
+
+def encoded_question_ids(stored):
+    """The id set a compact value was encoded against, for rebuilding its order."""
+    return unpack_ranges(stored.get('r'))
+
+
+def decode_answers(stored, question_ids, options_by_id):
+    """
+    Plain {str id: text} answers from either format. For compact values,
+    question_ids must be the same presented order used when encoding, and
+    options_by_id the snapshot named by "s". Values written before snapshots
+    have no "s" and can only be decoded against the live options, where an
+    index whose question or option no longer exists is dropped.
+    """
+    if not is_compact(stored):
+        return dict(stored or {})
+    answers = {}
+    for qid, code in zip(question_ids, stored.get('c') or []):
+        if code < 0:
+            continue
+        options = options_by_id.get(qid) or []
+        if code < len(options):
+            answers[str(qid)] = options[code]
+    answers.update(stored.get('t') or {})
+    return answers
@@ -0,0 +1,245 @@
+"""
+Async counterparts of the exam start/submit/status endpoints for ASGI
+deployments. They answer with the same bodies as ResultViewSet, but every
+query goes through the async ORM, so a worker waiting on the database can
+keep serving other students instead of holding a thread.
+
+Cache-backed helpers (question pack, answer key, autosave buffer, admission
+bucket) stay synchronous and are called through sync_to_async; on a warm
+cache they never reach the database.
+"""
+import json
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+from .models import Exam, ExamAttempt, ExamAttemptStats, Result
+from .question_pack import (
+    get_question_pack, get_answer_key, new_seed, question_order_for, question_set_for, attempt_answers, stored_answers
+)
+from .exam_payloads import attempt_payload, attempt_status_payload, submission_payload
+from .grading import normalize_answers, grade_answers
+from .autosave import buffered_answers, discard_buffer, merge_answers
+from .admission import admit_start
+from .attempt_stats import record_finished_attempt
+from .item_stats import record_item_stats
+from .jobs import enqueue
+from .attempt_state import afinish_attempt, create_attempt
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def _exam_user(request):
+    """The authenticated user, or the error response to send instead."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None, JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+    return user, None
+
+
+async def _attempt_response(attempt, exam, now, answers=None):
+    pack = await sync_to_async(get_question_pack)(exam.id, exam.pack_version)
+    return JsonResponse(attempt_payload(attempt, exam, pack, now, answers=answers))
+
+
+async def _resume_response(attempt, exam, now):
+    saved = await sync_to_async(buffered_answers)(attempt.id)
+    if saved is None:
+        saved = await sync_to_async(attempt_answers)(attempt)
+    return await _attempt_response(attempt, exam, now, answers=saved)
+
+
+@require_POST
+async def start_exam(request):
+    """Create a timed attempt and return randomized questions."""
+    user, denied = await _exam_user(request)
+    if denied:
+        return denied
+    if user.is_staff:
+        return _error('Staff users cannot take exams.', 403)
+
+    data = _json_body(request)
+    if data is None:
+        return _error('Request body must be a JSON object', 400)
+    exam_id = data.get('exam_id')
+    if not exam_id:
+        return _error('exam_id is required', 400)
+
+    exam = await Exam.objects.filter(id=exam_id).afirst()
+    if exam is None:
+        return _error('Exam not found', 404)
+
+    if exam.assigned_to_id and exam.assigned_to_id != user.id:
+        return _error('This exam is not assigned to you.', 403)
+
+    now = timezone.now()
+
+    # An in-progress attempt is resumed (or expired); a provisioned one is activated
+    open_attempts = [a async for a in ExamAttempt.objects.filter(
+        user=user, exam=exam, status__in=['in_progress', 'provisioned']
+    ).order_by('-started_at')]
+    active = next((a for a in open_attempts if a.status == 'in_progress'), None)
+    provisioned = next((a for a in open_attempts if a.status == 'provisioned'), None)
+    if active:
+        if now <= active.expires_at:
+            return await _resume_response(active, exam, now)
+        if await afinish_attempt(active, 'expired', now):
+            await sync_to_async(record_finished_attempt)(active)
+
+    expires_at = now + timedelta(minutes=int(exam.duration_minutes or 0))
+    ip_address = request.META.get('REMOTE_ADDR')
+    user_agent = (request.META.get('HTTP_USER_AGENT') or '')[:1000]
+
+    if provisioned:
+        question_set = question_set_for(await sync_to_async(get_question_pack)(exam.id, exam.pack_version))
+        claimed = await ExamAttempt.objects.filter(pk=provisioned.pk, status='provisioned').aupdate(
+            status='in_progress',
+            started_at=now,
+            expires_at=expires_at,
+            question_set=question_set,
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+        if not claimed:
+            return await _resume_response(await ExamAttempt.objects.aget(pk=provisioned.pk), exam, now)
+        provisioned.expires_at = expires_at
+        provisioned.question_set = question_set
+        return await _attempt_response(provisioned, exam, now)
+
+    admission = await sync_to_async(admit_start)(exam, now)
+    if not admission.admitted:
+        response = JsonResponse({
+            'error': 'Many students are starting this exam right now. Please wait.',
+            'queue_position': admission.queue_position,
+            'retry_after': admission.retry_after,
+        }, status=429)
+        response['Retry-After'] = str(admission.retry_after)
+        return response
+
+    completed_attempts = await ExamAttemptStats.objects.filter(user=user, exam=exam).values_list(
+        'attempts_used', flat=True
+    ).afirst() or 0
+
+    max_attempts = int(exam.max_attempts or 0)
+    if max_attempts > 0 and completed_attempts >= max_attempts:
+        return _error('Retake limit reached for this exam.', 403)
+
+    pack = await sync_to_async(get_question_pack)(exam.id, exam.pack_version)
+    if not pack:
+        return _error('No questions found for this exam', 400)
+
+    # create_attempt needs a transaction for its savepoint, so it runs in a thread
+    attempt, created = await sync_to_async(create_attempt)(
+        user,
+        exam,
+        completed_attempts + 1,
+        expires_at=expires_at,
+        seed=new_seed(),
+        question_set=question_set_for(pack),
+        ip_address=ip_address,
+        user_agent=user_agent,
+    )
+    if not created:
+        return await _resume_response(attempt, exam, now)
+    return await _attempt_response(attempt, exam, now)
+
+
+@require_POST
+async def submit_exam(request):
+    user, denied = await _exam_user(request)
+    if denied:
+        return denied
+    if user.is_staff:
+        return _error('Staff users cannot submit exams.', 403)
+
+    data = _json_body(request)
+    if data is None:
+        return _error('Request body must be a JSON object', 400)
+    attempt_id = data.get('attempt_id')
+    answers = data.get('answers') or {}
+    if not attempt_id:
+        return _error('attempt_id is required', 400)
+
+    attempt = await ExamAttempt.objects.select_related('exam').filter(id=attempt_id, user=user).afirst()
+    if attempt is None:
+        return _error('Attempt not found', 404)
+    if attempt.status != 'in_progress':
+        return _error('This attempt is already submitted.', 400)
+
+    exam = attempt.exam
+    now = timezone.now()
+    is_expired = now > attempt.expires_at
+
+    saved = await sync_to_async(buffered_answers)(attempt.id)
+    if saved is None:
+        saved = await sync_to_async(attempt_answers)(attempt)
+    normalized = normalize_answers(merge_answers(saved, answers))
+
+    answer_key = await sync_to_async(get_answer_key)(exam.id, exam.pack_version)
+    question_ids = question_order_for(attempt, answer_key.keys())
+    if not question_ids:
+        return _error('No questions found for this exam', 400)
+
+    score = grade_answers(answer_key, question_ids, normalized)
+    passed = score >= float(exam.pass_score)
+
+    pack = await sync_to_async(get_question_pack)(exam.id, exam.pack_version)
+    stored = await sync_to_async(stored_answers)(normalized, question_ids, pack)
+    if not await afinish_attempt(
+        attempt,
+        'expired' if is_expired else 'completed',
+        now,
+        answers=stored,
+        score=score,
+        passed=passed,
+    ):
+        return _error('This attempt is already submitted.', 400)
+    await sync_to_async(discard_buffer)(attempt.id)
+    await sync_to_async(record_finished_attempt)(attempt)
+    await sync_to_async(record_item_stats)(answer_key, question_ids, normalized)
+
+    result, created = await Result.objects.aget_or_create(
+        user=user,
+        exam=exam,
+        defaults={'score': score, 'passed': passed}
+    )
+    if not created:
+        result.score = score
+        result.passed = passed
+        result.taken_at = now
+        await result.asave(update_fields=['score', 'passed', 'taken_at'])
+
+    if passed:
+        await sync_to_async(enqueue)('issue_exam_certificate', user_id=user.id, exam_id=exam.id, score=score)
+
+    return JsonResponse(submission_payload(attempt))
+
+
+@require_GET
+async def attempt_status(request):
+    """Status, remaining time and score of one of the user's attempts."""
+    user, denied = await _exam_user(request)
+    if denied:
+        return denied
+
+    attempt_id = request.GET.get('attempt_id')
+    if not attempt_id:
+        return _error('attempt_id is required', 400)
+
+    attempt = await ExamAttempt.objects.filter(id=attempt_id, user=user).only(
+        'id', 'attempt_number', 'status', 'expires_at', 'submitted_at', 'score', 'passed'
+    ).afirst()
+    if attempt is None:
+        return _error('Attempt not found', 404)
+    return JsonResponse(attempt_status_payload(attempt, timezone.now()))
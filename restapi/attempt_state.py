@@ -0,0 +1,57 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from .models import ExamAttempt
+
+# Attempt state changes are single conditional UPDATEs: the row count says
+# whether this request made the transition, so a concurrent submit, expiry or
+# sweep can never finish the same attempt twice.
+
+
+def finish_attempt(attempt, status, submitted_at, **fields):
+    """
+    Move an in-progress attempt to 'completed' or 'expired'. Returns False,
+    without writing anything, if another request finished it first.
+    """
+    finished = ExamAttempt.objects.filter(pk=attempt.pk, status='in_progress').update(
+        status=status, submitted_at=submitted_at, **fields
+    )
+    if finished:
+        attempt.status = status
+        attempt.submitted_at = submitted_at
+        for name, value in fields.items():
+            setattr(attempt, name, value)
+    return bool(finished)
+
+
+async def afinish_attempt(attempt, status, submitted_at, **fields):
+    finished = await ExamAttempt.objects.filter(pk=attempt.pk, status='in_progress').aupdate(
+        status=status, submitted_at=submitted_at, **fields
+    )
+    if finished:
+        attempt.status = status
+        attempt.submitted_at = submitted_at
+        for name, value in fields.items():
+            setattr(attempt, name, value)
+    return bool(finished)
+
+
+def create_attempt(user, exam, attempt_number, **fields):
+    """
+    Create an in-progress attempt. When a concurrent start wins the
+    (user, exam, attempt_number) slot, its attempt is returned instead, so
+    double-clicked starts converge on one attempt. Returns (attempt, created).
+    """
+    try:
+        with transaction.atomic():
+            return ExamAttempt.objects.create(user=user, exam=exam, attempt_number=attempt_number, **fields), True
+    except IntegrityError:
+        pass
+
+    winner = ExamAttempt.objects.filter(user=user, exam=exam, status='in_progress').order_by('-started_at').first()
+    if winner:
+        return winner, False
+
+    # The slot went to an attempt that has already finished; take the next free number
+    taken = ExamAttempt.objects.filter(user=user, exam=exam).aggregate(n=Max('attempt_number'))['n'] or 0
+    with transaction.atomic():
+        return ExamAttempt.objects.create(user=user, exam=exam, attempt_number=taken + 1, **fields), True
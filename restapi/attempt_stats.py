@@ -0,0 +1,81 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import ExamAttempt, ExamAttemptStats
+
+
+def attempts_used(user_id, exam_id):
+    """Completed or expired attempts for the retake limit; one indexed lookup."""
+    used = ExamAttemptStats.objects.filter(user_id=user_id, exam_id=exam_id).values_list(
+        'attempts_used', flat=True
+    ).first()
+    return used or 0
+
+
+def stats_by_exam(user_id):
+    return {s.exam_id: s for s in ExamAttemptStats.objects.filter(user_id=user_id)}
+
+
+def record_finished_attempt(attempt):
+    """Fold a just-completed or expired attempt into its (user, exam) stats row."""
+    changes = {
+        'attempts_used': F('attempts_used') + 1,
+        'last_score': attempt.score,
+        'last_attempt_id': attempt.id,
+    }
+    if attempt.score is not None:
+        score = Value(float(attempt.score))
+        changes['best_score'] = Greatest(Coalesce('best_score', score), score)
+    if attempt.passed:
+        changes['passed'] = True
+
+    rows = ExamAttemptStats.objects.filter(user_id=attempt.user_id, exam_id=attempt.exam_id)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            ExamAttemptStats.objects.create(
+                user_id=attempt.user_id,
+                exam_id=attempt.exam_id,
+                attempts_used=1,
+                best_score=attempt.score,
+                last_score=attempt.score,
+                last_attempt_id=attempt.id,
+                passed=bool(attempt.passed),
+            )
+    except IntegrityError:
+        # Another request created the row first
+        rows.update(**changes)
+
+
+def rebuild_exam_stats(exam_id):
+    """Recompute every stats row of an exam from its attempts, e.g. after a regrade."""
+    finished = ExamAttempt.objects.filter(exam_id=exam_id, status__in=['completed', 'expired'])
+    latest = finished.filter(user_id=OuterRef('user_id')).order_by('-submitted_at', '-pk')
+    rows = finished.values('user_id').annotate(
+        used=Count('id'),
+        best=Max('score'),
+        any_passed=Count('id', filter=Q(passed=True)),
+        last_id=Subquery(latest.values('pk')[:1]),
+        last_score=Subquery(latest.values('score')[:1]),
+    )
+
+    existing = {s.user_id: s for s in ExamAttemptStats.objects.filter(exam_id=exam_id)}
+    to_create = []
+    to_update = []
+    for row in rows:
+        stats = existing.pop(row['user_id'], None) or ExamAttemptStats(user_id=row['user_id'], exam_id=exam_id)
+        stats.attempts_used = row['used']
+        stats.best_score = row['best']
+        stats.last_score = row['last_score']
+        stats.last_attempt_id = row['last_id']
+        stats.passed = row['any_passed'] > 0
+        (to_update if stats.pk else to_create).append(stats)
+
+    with transaction.atomic():
+        ExamAttemptStats.objects.bulk_update(
+            to_update, ['attempts_used', 'best_score', 'last_score', 'last_attempt', 'passed']
+        )
+        ExamAttemptStats.objects.bulk_create(to_create)
+        # Rows left over no longer have any finished attempt behind them
+        ExamAttemptStats.objects.filter(pk__in=[s.pk for s in existing.values()]).delete()
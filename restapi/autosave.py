@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import ExamAttempt
+from .question_pack import attempt_answers
+
+# Autosaved answers are buffered in the cache and written to ExamAttempt.answers
+# at most once per flush interval, so clicking through an exam does not turn
+# into one UPDATE per click. A save that lands inside the interval is only
+# buffered; the client follows it with a flush request (an idle tick, or the
+# page going away) so the last answers of a burst still reach the database.
+# Submit and the expiry sweep read the buffer first either way, which is why
+# it has to live in a cache every process shares (see CACHES in settings).
+FLUSH_SECONDS = getattr(settings, 'EXAM_AUTOSAVE_FLUSH_SECONDS', 10)
+BUFFER_GRACE_SECONDS = 60 * 60
+
+
+def _buffer_key(attempt_id):
+    return f"attempt:{attempt_id}:answers"
+
+
+def _flush_lock_key(attempt_id):
+    return f"attempt:{attempt_id}:flushed"
+
+
+def merge_answers(state, delta):
+    """
+    Apply an answer delta to a stored answers dict keyed by question id
+    strings. A null or empty value clears the answer.
+    """
+    merged = dict(state or {})
+    if not isinstance(delta, dict):
+        return merged
+    for k, v in delta.items():
+        key = str(k).strip()
+        if key.startswith('q'):
+            key = key[1:]
+        if not key.isdigit():
+            continue
+        if v is None or str(v).strip() == '':
+            merged.pop(key, None)
+        else:
+            merged[key] = str(v).strip()
+    return merged
+
+
+def buffered_answers(attempt_id):
+    """Latest autosaved answers for an attempt, or None if nothing is buffered."""
+    return cache.get(_buffer_key(attempt_id))
+
+
+def discard_buffer(attempt_id):
+    cache.delete_many([_buffer_key(attempt_id), _flush_lock_key(attempt_id)])
+
+
+def autosave_answers(attempt, delta, flush=False):
+    """
+    Merge a delta into the attempt's buffered answers and flush them to the
+    database if the last flush is older than FLUSH_SECONDS, or always with
+    flush. Returns (answers, flushed).
+    """
+    state = buffered_answers(attempt.id)
+    if state is None:
+        state = attempt_answers(attempt)
+    state = merge_answers(state, delta)
+
+    remaining = max(0, int((attempt.expires_at - timezone.now()).total_seconds()))
+    cache.set(_buffer_key(attempt.id), state, remaining + BUFFER_GRACE_SECONDS)
+
+    # add() only succeeds once per interval, which coalesces concurrent flushes
+    flushed = cache.add(_flush_lock_key(attempt.id), True, FLUSH_SECONDS)
+    if flush and not flushed:
+        cache.set(_flush_lock_key(attempt.id), True, FLUSH_SECONDS)
+        flushed = True
+    if flushed:
+        ExamAttempt.objects.filter(pk=attempt.pk, status='in_progress').update(answers=state)
+    return state, flushed
@@ -0,0 +1,94 @@
+import csv
+import io
+import zipfile
+from .certificate_pdf import cached_certificate_pdf, certificate_fields
+
+# The archive is written into a sink that is drained after every piece, so a
+# response never holds more than one read buffer of it however many
+# certificates the exam has. ZipFile falls back to data descriptors on an
+# unseekable stream, which is what lets entries go out before their size is known.
+READ_SIZE = 64 * 1024
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_COLUMNS = [
+    'certificate_number', 'file', 'name', 'username', 'exam', 'institution', 'score', 'issued_date',
+    'revoked', 'verification_token',
+]
+
+
+class _Sink(io.RawIOBase):
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def certificate_filename(certificate):
+    return f"Certificate_{certificate.certificate_number}.pdf"
+
+
+def _entry(name, when, compress_type):
+    info = zipfile.ZipInfo(name, date_time=when.timetuple()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def stream_certificates_zip(certificates, now):
+    """
+    Yield a ZIP of the certificates' PDFs plus a manifest CSV. The queryset is
+    iterated twice, once for the manifest and once for the files, both with
+    server-side chunking. PDFs come from the rendered cache, rendering any
+    that are missing.
+    """
+    return (part for part in _zip_parts(certificates, now) if part)
+
+
+def _zip_parts(certificates, now):
+    certificates = certificates.select_related('user', 'exam', 'task').order_by('id')
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        with archive.open(_entry(MANIFEST_NAME, now, zipfile.ZIP_DEFLATED), 'w') as raw:
+            manifest = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+            writer = csv.writer(manifest)
+            writer.writerow(MANIFEST_COLUMNS)
+            for certificate in certificates.iterator(chunk_size=500):
+                writer.writerow([
+                    certificate.certificate_number,
+                    certificate_filename(certificate),
+                    certificate.name or certificate.user.get_full_name() or certificate.user.username,
+                    certificate.user.username,
+                    certificate.exam.name if certificate.exam else (certificate.task.name if certificate.task else ''),
+                    certificate.institution or '',
+                    '' if certificate.score is None else certificate.score,
+                    certificate.issued_date.isoformat(),
+                    'yes' if certificate.revoked else 'no',
+                    certificate_fields(certificate)['token'],
+                ])
+                manifest.flush()
+                yield sink.drain()
+            manifest.flush()
+            manifest.detach()
+        yield sink.drain()
+
+        for certificate in certificates.iterator(chunk_size=500):
+            pdf, _ = cached_certificate_pdf(certificate, certificate_fields(certificate))
+            # PDF page streams are already compressed; deflating them again only costs CPU
+            entry = _entry(certificate_filename(certificate), certificate.issued_date, zipfile.ZIP_STORED)
+            with pdf, archive.open(entry, 'w') as out:
+                while True:
+                    block = pdf.read(READ_SIZE)
+                    if not block:
+                        break
+                    out.write(block)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
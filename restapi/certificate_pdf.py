@@ -0,0 +1,329 @@
+import hashlib
+import json
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from django.conf import settings
+from .certificate_signing import sign_claims, verify_url
+
+# Rendered PDFs are stored content-addressed: the file name is a hash of every
+# field printed on the certificate plus TEMPLATE_VERSION. Changing the data or
+# bumping the version yields a new name, so nothing ever has to be purged and
+# the hash doubles as the download's ETag.
+TEMPLATE_VERSION = 4
+PDF_SUBDIR = 'certificates/pdf'
+# Downloads revalidate by ETag once this runs out; certificate fields rarely change after issue
+PDF_MAX_AGE = 60 * 60 * 24 * 7
+
+
+def certificate_fields(certificate):
+    """Everything the template prints, already resolved to display strings."""
+    title = "Unknown Certification"
+    if certificate.exam:
+        title = certificate.exam.name
+    elif certificate.task:
+        title = certificate.task.name
+    fields = {
+        'name': certificate.name or certificate.user.get_full_name() or certificate.user.username,
+        'title': title,
+        'institution': certificate.institution or '',
+        'score': int(round(certificate.score)) if certificate.score is not None else None,
+        'number': certificate.certificate_number,
+        'issued': certificate.issued_date.strftime('%B %d, %Y'),
+    }
+    # Signs exactly what is printed, so the token vouches for the page it sits on
+    fields['token'] = sign_claims(
+        fields['number'], fields['name'], fields['title'], fields['score'], certificate.issued_date.date()
+    )
+    return fields
+
+
+def content_hash(fields):
+    payload = json.dumps([TEMPLATE_VERSION, fields], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def pdf_path(digest, media_root=None):
+    return Path(media_root or settings.MEDIA_ROOT) / PDF_SUBDIR / digest[:2] / f"{digest}.pdf"
+
+
+class _StaticLayer:
+    """
+    The parts of the certificate that never change: styles, the fixed
+    paragraphs, and where every line sits. Each per-certificate field gets
+    exactly one line, shrunk to fit the frame width when it is too long, so
+    the page has a fixed frame. Only the optional institution and score rows
+    move things, which gives four layouts. Built once per process. Each
+    document draws its layout's fixed paragraphs once, as a form XObject, and
+    writes the field lines over it.
+    """
+
+    def __init__(self):
+        from reportlab.lib.colors import toColor
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.fonts import ps2tt, tt2ps
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph
+
+        self.inch = inch
+        self.pagesize = letter
+        # Same frame SimpleDocTemplate used: one-inch margins and 6pt padding
+        self.left = inch + 6
+        self.top = letter[1] - inch - 6
+        self.width = letter[0] - 2 * inch - 12
+
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=48,
+            textColor='#8B4513',
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+        self.body_style = ParagraphStyle(
+            'CustomBody',
+            parent=styles['Normal'],
+            fontSize=14,
+            alignment=TA_CENTER,
+            spaceAfter=12
+        )
+        self.name_style = ParagraphStyle(
+            'CustomName',
+            parent=styles['Heading2'],
+            fontSize=24,
+            textColor='#8B4513',
+            alignment=TA_CENTER,
+            spaceAfter=12,
+            fontName='Helvetica-Bold'
+        )
+        self.exam_style = ParagraphStyle(
+            'CustomExam',
+            parent=styles['Heading3'],
+            fontSize=16,
+            alignment=TA_CENTER,
+            spaceAfter=12
+        )
+        self.details_style = ParagraphStyle(
+            'CustomDetails',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_CENTER,
+            spaceAfter=6,
+            textColor='#666666'
+        )
+
+        self.footer_style = ParagraphStyle(
+            'CertificateFooter',
+            parent=styles['Normal'],
+            fontSize=7,
+            leading=9,
+            alignment=TA_CENTER,
+            textColor='#999999'
+        )
+        self.token_style = ParagraphStyle(
+            'CertificateToken',
+            parent=self.footer_style,
+            fontName='Courier'
+        )
+
+        self.fixed = {
+            'title': Paragraph("Certificate of Completion", self.title_style),
+            'certify': Paragraph("This is to certify that", self.body_style),
+            'completed': Paragraph("has successfully completed the examination", self.body_style),
+            'recognition': Paragraph("In recognition of the achievement and competency demonstrated", self.body_style),
+        }
+        for paragraph in self.fixed.values():
+            paragraph.wrap(self.width, self.pagesize[1])
+
+        self._colors = {}
+        self._bold = {}
+        for style in (self.body_style, self.name_style, self.exam_style, self.details_style, self.footer_style,
+                      self.token_style):
+            self._colors[style.name] = toColor(style.textColor)
+            family, _, italic = ps2tt(style.fontName)
+            self._bold[style.name] = tt2ps(family, 1, italic)
+
+        self.layouts = {
+            (institution, score): self._layout(institution, score)
+            for institution in (False, True)
+            for score in (False, True)
+        }
+
+    def _layout(self, institution, score):
+        """
+        Where the fixed paragraphs go (key -> bottom y) and the baseline of
+        each field line (slot -> y), for one combination of optional rows.
+        Paragraph baselines follow platypus: fontSize below the top.
+        """
+        inch = self.inch
+        # (fixed paragraph key, or (slot, style), or None for a plain gap; gap after it)
+        flow = [
+            (None, 1.5*inch),
+            ('title', 0.5*inch),
+            ('certify', 0.2*inch),
+            (('name', self.name_style), 0.3*inch),
+            ('completed', 0.1*inch),
+            (('title', self.exam_style), 0.2*inch),
+        ]
+        if institution:
+            flow.append((('institution', self.body_style), 0.1*inch))
+        if score:
+            flow.append((('score', self.body_style), 0.2*inch))
+        flow.append(('recognition', 0.5*inch))
+        flow.append((('number', self.details_style), 0))
+        flow.append((('issued', self.details_style), 0))
+
+        fixed = {}
+        baselines = {}
+        y = self.top
+        for item, gap in flow:
+            if isinstance(item, str):
+                paragraph = self.fixed[item]
+                fixed[item] = y - paragraph.style.spaceBefore - paragraph.height
+                y = fixed[item] - paragraph.style.spaceAfter
+            elif item is not None:
+                slot, style = item
+                baselines[slot] = y - style.spaceBefore - style.fontSize
+                y -= style.spaceBefore + style.leading + style.spaceAfter
+            y -= gap
+        return fixed, baselines
+
+    def draw_frame(self, canvas, layout_key):
+        """Draw the fixed paragraphs of a layout, as a form XObject defined once per document."""
+        name = 'frame-%d%d' % layout_key
+        if not canvas.hasForm(name):
+            canvas.beginForm(name)
+            for key, bottom in self.layouts[layout_key][0].items():
+                self.fixed[key].drawOn(canvas, self.left, bottom)
+            canvas.endForm()
+        canvas.doForm(name)
+
+    def draw_line(self, canvas, style, baseline, *runs):
+        """
+        Draw (text, bold) runs centred on one line at baseline. Runs too wide
+        for the frame are drawn at the font size that makes them fit, so no
+        word, however long, runs into the margin.
+        """
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        fonts = {False: style.fontName, True: self._bold[style.name]}
+        size = style.fontSize
+        runs = [(' '.join(text.split()), fonts[bold]) for text, bold in runs]
+        runs = [(text, font) for text, font in runs if text]
+        widths = [stringWidth(text, font, size) for text, font in runs]
+        spaces = [stringWidth(' ', font, size) for _, font in runs[1:]]
+        total = sum(widths) + sum(spaces)
+        scale = min(1, self.width / total) if total else 1
+
+        canvas.setFillColor(self._colors[style.name])
+        x = self.left + (self.width - total * scale) / 2
+        for i, (text, font) in enumerate(runs):
+            if i:
+                x += spaces[i - 1] * scale
+            canvas.setFont(font, size * scale)
+            canvas.drawString(x, baseline, text)
+            x += widths[i] * scale
+
+    def token_lines(self, token):
+        """A token has no spaces to wrap at, so it is cut into fixed-width monospace lines."""
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        per_line = max(1, int(self.width // stringWidth('M', self.token_style.fontName, self.token_style.fontSize)))
+        return [token[i:i + per_line] for i in range(0, len(token), per_line)]
+
+
+_static_layer = None
+
+
+def static_layer():
+    global _static_layer
+    if _static_layer is None:
+        # A race here only builds the layer twice; both copies are identical
+        _static_layer = _StaticLayer()
+    return _static_layer
+
+
+def render_certificate_pdf(fields):
+    """Stamp the certificate fields over the prebuilt static frame and return the PDF bytes."""
+    from reportlab.pdfgen.canvas import Canvas
+
+    layer = static_layer()
+    inch = layer.inch
+    buffer = BytesIO()
+    canvas = Canvas(buffer, pagesize=layer.pagesize)
+
+    layout_key = (bool(fields['institution']), fields['score'] is not None)
+    layer.draw_frame(canvas, layout_key)
+    baselines = layer.layouts[layout_key][1]
+    layer.draw_line(canvas, layer.name_style, baselines['name'], (fields['name'], False))
+    layer.draw_line(canvas, layer.exam_style, baselines['title'], (fields['title'], True))
+    if fields['institution']:
+        layer.draw_line(canvas, layer.body_style, baselines['institution'], ("from", False), (fields['institution'], True))
+    if fields['score'] is not None:
+        layer.draw_line(canvas, layer.body_style, baselines['score'], ("with a score of", False), (f"{fields['score']}%", True))
+    layer.draw_line(canvas, layer.details_style, baselines['number'], (f"Certificate No.: {fields['number']}", False))
+    layer.draw_line(canvas, layer.details_style, baselines['issued'], (f"Issued: {fields['issued']}", False))
+
+    # Footer: the verify link and the signed token under it, anchored to the bottom margin
+    link = verify_url(fields['token'])
+    footer = layer.footer_style
+    token_lines = layer.token_lines(fields['token'])
+    top = inch * 0.5 + (1 + len(token_lines)) * footer.leading
+    baseline = top - footer.fontSize
+    layer.draw_line(canvas, footer, baseline, ("Verify this certificate at", False), (link.split('?', 1)[0], False))
+    for line in token_lines:
+        baseline -= footer.leading
+        layer.draw_line(canvas, layer.token_style, baseline, (line, False))
+    canvas.linkURL(link, (layer.left, inch * 0.5, layer.left + layer.width, top), relative=0)
+
+    canvas.showPage()
+    canvas.save()
+    return buffer.getvalue()
+
+
+def _write_pdf(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write beside the target and rename, so a concurrent download never reads half a file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def cached_certificate_pdf(certificate, fields=None):
+    """
+    The rendered PDF of a certificate as an open binary file, rendering and
+    storing it on first use. Where MEDIA_ROOT cannot be written (Vercel's
+    filesystem is read-only) every call renders into memory instead; the
+    digest, and so the ETag, is the same either way. Returns (file, digest).
+    """
+    fields = fields or certificate_fields(certificate)
+    digest = content_hash(fields)
+    path = pdf_path(digest)
+    try:
+        return open(path, 'rb'), digest
+    except FileNotFoundError:
+        pass
+    data = render_certificate_pdf(fields)
+    try:
+        _write_pdf(path, data)
+    except OSError:
+        pass
+    return BytesIO(data), digest
+
+
+def prerender_pdf(fields, media_root):
+    """Process-pool entry point: render one certificate's fields unless already on disk."""
+    path = pdf_path(content_hash(fields), media_root)
+    if not path.exists():
+        _write_pdf(path, render_certificate_pdf(fields))
+    return path.name
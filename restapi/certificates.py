@@ -0,0 +1,103 @@
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from .models import Certificate, Result, normalize_certificate_number
+from .certificate_pdf import certificate_fields, content_hash, pdf_path, prerender_pdf
+
+DEFAULT_INSTITUTION = 'TaskCert Platform'
+DEFAULT_CHUNK_SIZE = 500
+
+
+def new_certificate_number(prefix='CERT'):
+    return f"{prefix}-{uuid.uuid4().hex[:10].upper()}"
+
+
+def build_exam_certificate(user, exam, score, institution=DEFAULT_INSTITUTION):
+    """Unsaved Certificate for a passed exam, ready for save() or bulk_create()."""
+    number = new_certificate_number()
+    return Certificate(
+        user=user,
+        exam=exam,
+        certificate_number=number,
+        # Set here as well as in save(), because bulk_create() skips save()
+        certificate_key=normalize_certificate_number(number),
+        name=user.get_full_name() or user.username,
+        institution=institution,
+        score=score,
+    )
+
+
+def pending_results(exam_ids=None):
+    """Passed results with no certificate for that user and exam, as one anti-join."""
+    certified = Certificate.objects.filter(user_id=OuterRef('user_id'), exam_id=OuterRef('exam_id'))
+    results = Result.objects.filter(passed=True).filter(~Exists(certified))
+    if exam_ids:
+        results = results.filter(exam_id__in=exam_ids)
+    return results
+
+
+def issue_certificates(exam_ids=None, institution=DEFAULT_INSTITUTION, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Create certificates for every pending result, one bulk INSERT per keyset
+    chunk. Each chunk commits on its own and issued results drop out of the
+    anti-join, so an interrupted run simply picks up where it stopped.
+    Returns the ids of the new certificates.
+    """
+    results = pending_results(exam_ids).select_related('user', 'exam').order_by('pk')
+    issued = []
+    last_pk = 0
+    while True:
+        chunk = list(results.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        certificates = [build_exam_certificate(r.user, r.exam, r.score, institution) for r in chunk]
+        with transaction.atomic():
+            Certificate.objects.bulk_create(certificates)
+        # bulk_create leaves pk unset on backends without RETURNING; fall back to the numbers
+        if certificates[0].pk is None:
+            numbers = [c.certificate_number for c in certificates]
+            issued.extend(Certificate.objects.filter(certificate_number__in=numbers).values_list('id', flat=True))
+        else:
+            issued.extend(c.pk for c in certificates)
+        if progress:
+            progress(len(issued))
+    return issued
+
+
+def prerender_certificates(certificates, workers=None, progress=None):
+    """
+    Render the PDFs that are not on disk yet across a process pool. Files are
+    content-addressed, so a rerun skips everything already rendered.
+    Returns the number rendered.
+    """
+    media_root = str(settings.MEDIA_ROOT)
+    missing = {}
+    for certificate in certificates.select_related('user', 'exam', 'task').iterator():
+        fields = certificate_fields(certificate)
+        digest = content_hash(fields)
+        if digest not in missing and not pdf_path(digest).exists():
+            missing[digest] = fields
+    if not missing:
+        return 0
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    done = 0
+    if workers <= 1:
+        for fields in missing.values():
+            prerender_pdf(fields, media_root)
+            done += 1
+            if progress:
+                progress(done, len(missing))
+        return done
+
+    # Workers only render and write files; they never touch the database
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(prerender_pdf, missing.values(), [media_root] * len(missing), chunksize=16):
+            done += 1
+            if progress and (done % 50 == 0 or done == len(missing)):
+                progress(done, len(missing))
+    return done
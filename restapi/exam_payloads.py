@@ -0,0 +1,42 @@
+from .question_pack import pack_payload, question_order_for
+
+# Response bodies shared by the sync (DRF) and async exam endpoints, so both
+# stay byte-for-byte compatible with the take-exam page.
+
+
+def attempt_payload(attempt, exam, pack, now, answers=None):
+    question_ids = question_order_for(attempt, [q['id'] for q in pack])
+    return {
+        'attempt_id': attempt.id,
+        'attempt_number': attempt.attempt_number,
+        'expires_at': attempt.expires_at.isoformat(),
+        'duration_seconds': int(max(0, (attempt.expires_at - now).total_seconds())),
+        'max_attempts': int(exam.max_attempts or 0),
+        'questions': pack_payload(pack, question_ids, seed=attempt.seed),
+        'answers': answers or {},
+    }
+
+
+def attempt_status_payload(attempt, now):
+    """Lightweight status for polling; an overdue attempt reads as expired before the sweep."""
+    overdue = attempt.status == 'in_progress' and now > attempt.expires_at
+    return {
+        'attempt_id': attempt.id,
+        'attempt_number': attempt.attempt_number,
+        'status': 'expired' if overdue else attempt.status,
+        'expires_at': attempt.expires_at.isoformat(),
+        'remaining_seconds': int(max(0, (attempt.expires_at - now).total_seconds())),
+        'submitted_at': attempt.submitted_at.isoformat() if attempt.submitted_at else None,
+        'score': attempt.score,
+        'passed': attempt.passed,
+    }
+
+
+def submission_payload(attempt):
+    return {
+        'score': attempt.score,
+        'passed': attempt.passed,
+        'status': attempt.status,
+        'attempt_number': attempt.attempt_number,
+        'message': 'Exam submitted successfully',
+    }
@@ -0,0 +1,97 @@
+from collections import defaultdict
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Exam, ExamAttempt
+from .question_pack import get_answer_key, get_question_pack, question_order_for, attempt_answers, stored_answers
+from .grading import grade_answers, normalize_answers, bulk_upsert_results
+from .autosave import buffered_answers, discard_buffer
+from .attempt_stats import record_finished_attempt
+from .item_stats import ItemTally, apply_item_tally
+from .jobs import enqueue
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def expire_overdue_attempts(now=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Expire every overdue in-progress attempt, grade the answers they had
+    saved, refresh the matching Result rows in bulk and queue the same
+    certificate and points jobs a submit would. Every attempt is graded in
+    the transaction that expires it, so this returns one count for both.
+    """
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            chunk = _claim_overdue(now, chunk_size)
+            if chunk is None:
+                break
+            _grade_expired(chunk, now)
+        # Only once the grades are committed; a rolled-back chunk is graded from the buffer again
+        for attempt in chunk:
+            discard_buffer(attempt.id)
+        expired += len(chunk)
+    return expired
+
+
+def _claim_overdue(now, chunk_size):
+    """
+    Expire up to chunk_size overdue attempts in the caller's transaction and
+    return them, or None once nothing is overdue. Claiming and grading commit together, so a sweep that dies
+    in between leaves its attempts in progress for the next one. Rows locked
+    by a concurrent sweep are skipped where the backend supports it; the
+    conditional UPDATE keeps a submit or another sweep from finishing the
+    same attempt twice either way, and the submitted_at stamp picks out the
+    rows this UPDATE won.
+    """
+    overdue = ExamAttempt.objects.filter(status='in_progress', expires_at__lt=now).order_by('pk')
+    if connection.features.has_select_for_update_skip_locked:
+        overdue = overdue.select_for_update(skip_locked=True)
+    ids = list(overdue.values_list('pk', flat=True)[:chunk_size])
+    if not ids:
+        return None
+    ExamAttempt.objects.filter(pk__in=ids, status='in_progress').update(status='expired', submitted_at=now)
+    return list(
+        ExamAttempt.objects.filter(pk__in=ids, status='expired', submitted_at=now, score__isnull=True).only(
+            'id', 'user_id', 'exam_id', 'question_order', 'seed', 'question_set', 'answers', 'score', 'passed'
+        )
+    )
+
+
+def _grade_expired(chunk, now):
+    if not chunk:
+        return
+    by_exam = defaultdict(list)
+    for attempt in chunk:
+        by_exam[attempt.exam_id].append(attempt)
+    exams = {exam.id: exam for exam in Exam.objects.filter(id__in=by_exam).only('id', 'name', 'pass_score', 'pack_version')}
+
+    result_rows = []
+    item_tally = ItemTally()
+    for exam_id, attempts in by_exam.items():
+        version = exams[exam_id].pack_version
+        answer_key = get_answer_key(exam_id, version)
+        pack = get_question_pack(exam_id, version)
+        for attempt in attempts:
+            # The buffer holds the full latest state, newer than any flush
+            saved = buffered_answers(attempt.id)
+            if saved is None:
+                saved = attempt_answers(attempt, pack)
+            question_ids = question_order_for(attempt, answer_key.keys())
+            answers = normalize_answers(saved)
+            attempt.answers = stored_answers(answers, question_ids, pack)
+            attempt.score = grade_answers(answer_key, question_ids, answers)
+            item_tally.add(answer_key, question_ids, answers)
+            attempt.passed = attempt.score >= float(exams[exam_id].pass_score)
+            result_rows.append((attempt.user_id, exam_id, attempt.score, attempt.passed, now))
+
+    ExamAttempt.objects.bulk_update(chunk, ['answers', 'score', 'passed'])
+    bulk_upsert_results(result_rows)
+    apply_item_tally(item_tally)
+    for attempt in chunk:
+        record_finished_attempt(attempt)
+        if attempt.passed:
+            # bulk_upsert_results skips the Result signal, so queue what a submit's save would
+            exam = exams[attempt.exam_id]
+            enqueue('award_points', user_id=attempt.user_id, points=50, description=f"Exam Passed: {exam.name}")
+            enqueue('issue_exam_certificate', user_id=attempt.user_id, exam_id=exam.id, score=attempt.score)
@@ -0,0 +1,76 @@
+from .models import Result
+from .question_pack import normalize_answer
+
+
+def normalize_answers(answers):
+    """Normalize answers: accept either {"q123": "A"} or {"123": "A"}."""
+    normalized = {}
+    if isinstance(answers, dict):
+        for k, v in answers.items():
+            key = str(k).strip()
+            if key.startswith('q'):
+                key = key[1:]
+            if key.isdigit():
+                normalized[int(key)] = normalize_answer(v)
+    return normalized
+
+
+def grade_answers(answer_key, question_ids, answers):
+    """
+    Score one set of normalized answers against an exam's answer key.
+    Every question in the presented order counts towards the total, even if it
+    has since been deleted, to match what the student was shown.
+    """
+    total_questions = len(question_ids)
+    if total_questions <= 0:
+        return 0.0
+
+    correct = 0
+    for qid in question_ids:
+        expected = answer_key.get(qid)
+        if expected is None:
+            continue
+        if answers.get(qid) == expected:
+            correct += 1
+    return round(correct * 100 / total_questions, 2)
+
+
+def grade_many(answer_key, rows):
+    """
+    Score many (question_ids, answers) pairs against one answer key.
+    Stored answers are keyed by stringified ids, so they are normalized here.
+    """
+    return [grade_answers(answer_key, question_ids, normalize_answers(answers)) for question_ids, answers in rows]
+
+
+def bulk_upsert_results(rows):
+    """
+    Write latest-attempt summaries to Result in bulk.
+    rows: iterable of (user_id, exam_id, score, passed, taken_at).
+    """
+    rows = {(user_id, exam_id): (score, passed, taken_at) for user_id, exam_id, score, passed, taken_at in rows}
+    if not rows:
+        return 0
+
+    existing = Result.objects.filter(
+        user_id__in={user_id for user_id, _ in rows},
+        exam_id__in={exam_id for _, exam_id in rows},
+    )
+    to_update = []
+    for result in existing:
+        row = rows.pop((result.user_id, result.exam_id), None)
+        if row is None:
+            continue
+        result.score, result.passed, result.taken_at = row
+        to_update.append(result)
+
+    # bulk_update/bulk_create skip post_save, so this never awards points
+    Result.objects.bulk_update(to_update, ['score', 'passed', 'taken_at'])
+    Result.objects.bulk_create(
+        [
+            Result(user_id=user_id, exam_id=exam_id, score=score, passed=passed, taken_at=taken_at)
+            for (user_id, exam_id), (score, passed, taken_at) in rows.items()
+        ],
+        ignore_conflicts=True,
+    )
+    return len(to_update) + len(rows)
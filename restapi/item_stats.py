@@ -0,0 +1,194 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Case, F, JSONField, PositiveIntegerField, Value, When
+from django.utils import timezone
+from .models import ExamAttempt, Question, QuestionStats
+from .question_pack import build_answer_key, get_question_pack, question_order_for, attempt_answers
+from .grading import normalize_answers
+
+# Short answers are free text, so the distribution keeps the most common
+# distinct answers and folds the long tail into one bucket.
+MAX_DISTINCT_ANSWERS = 50
+MAX_ANSWER_LENGTH = 100
+OTHER_ANSWERS = '(other)'
+# Below this many showings a popular distractor is more likely noise than a bad key
+SUSPECT_MIN_SHOWN = 10
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class ItemTally:
+    """Per-question counter deltas for a batch of graded attempts."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def add(self, answer_key, question_ids, answers):
+        """Count one attempt: answers are normalized {qid: answer} as used for grading."""
+        for qid in question_ids:
+            expected = answer_key.get(qid)
+            if expected is None:
+                # Deleted since the attempt was taken
+                continue
+            row = self.rows.get(qid)
+            if row is None:
+                row = self.rows[qid] = [0, 0, 0, Counter()]
+            row[0] += 1
+            given = answers.get(qid)
+            if given:
+                row[1] += 1
+                row[3][given[:MAX_ANSWER_LENGTH]] += 1
+                if given == expected:
+                    row[2] += 1
+
+
+def _merge_counts(counts, delta):
+    for answer, n in delta.items():
+        if answer not in counts and len(counts) >= MAX_DISTINCT_ANSWERS:
+            answer = OTHER_ANSWERS
+        counts[answer] = counts.get(answer, 0) + n
+    return counts
+
+
+def apply_item_tally(tally):
+    """
+    Fold a tally into QuestionStats without row locks: one INSERT for new
+    rows, one read of the answer distributions and one UPDATE. The counters
+    are incremented in the database, so concurrent submits never lose a
+    count. Distributions are merged here and written back, so of two
+    submits merging the same question at once only the later merge
+    survives; rebuild_item_stats recounts them exactly.
+    """
+    if not tally:
+        return
+    question_ids = sorted(tally.rows)
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=qid) for qid in question_ids], ignore_conflicts=True
+    )
+    answered_ids = [qid for qid in question_ids if tally.rows[qid][3]]
+    current = dict(
+        QuestionStats.objects.filter(question_id__in=answered_ids).values_list('question_id', 'answer_counts')
+    )
+
+    def increment(field, index):
+        return Case(
+            *[When(question_id=qid, then=F(field) + tally.rows[qid][index]) for qid in question_ids],
+            default=F(field),
+            output_field=PositiveIntegerField(),
+        )
+
+    changes = {
+        'times_shown': increment('times_shown', 0),
+        'times_answered': increment('times_answered', 1),
+        'times_correct': increment('times_correct', 2),
+        'updated_at': timezone.now(),
+    }
+    if answered_ids:
+        changes['answer_counts'] = Case(
+            *[
+                When(question_id=qid, then=Value(
+                    _merge_counts(dict(current.get(qid) or {}), tally.rows[qid][3]), output_field=JSONField()
+                ))
+                for qid in answered_ids
+            ],
+            default=F('answer_counts'),
+            output_field=JSONField(),
+        )
+    QuestionStats.objects.filter(question_id__in=question_ids).update(**changes)
+
+
+def record_item_stats(answer_key, question_ids, answers):
+    """Count a single just-graded attempt."""
+    tally = ItemTally()
+    tally.add(answer_key, question_ids, answers)
+    apply_item_tally(tally)
+
+
+def replace_item_stats(exam_id, tally):
+    """Overwrite an exam's counters with a full recount, e.g. from a backfill or regrade."""
+    now = timezone.now()
+    rows = []
+    for qid in Question.objects.filter(exam_id=exam_id).values_list('id', flat=True):
+        shown, answered, correct, counts = tally.rows.get(qid, (0, 0, 0, Counter()))
+        rows.append(QuestionStats(
+            question_id=qid,
+            times_shown=shown,
+            times_answered=answered,
+            times_correct=correct,
+            answer_counts=_merge_counts({}, dict(counts.most_common())),
+            updated_at=now,
+        ))
+    with transaction.atomic():
+        QuestionStats.objects.filter(question__exam_id=exam_id).delete()
+        QuestionStats.objects.bulk_create(rows)
+
+
+def rebuild_item_stats(exam_id, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Recount an exam from every graded attempt, streamed in keyset chunks. Returns the attempt count."""
+    answer_key = build_answer_key(exam_id)
+    question_ids = list(answer_key)
+    pack = get_question_pack(exam_id)
+    attempts = ExamAttempt.objects.filter(exam_id=exam_id, score__isnull=False).only(
+        'id', 'exam_id', 'question_order', 'seed', 'question_set', 'answers'
+    )
+    tally = ItemTally()
+    seen = 0
+    last_pk = 0
+    while True:
+        chunk = list(attempts.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        for attempt in chunk:
+            answers = normalize_answers(attempt_answers(attempt, pack))
+            tally.add(answer_key, question_order_for(attempt, question_ids), answers)
+        seen += len(chunk)
+        if progress:
+            progress(seen)
+    replace_item_stats(exam_id, tally)
+    return seen
+
+
+def item_analysis(exam):
+    """
+    Per-question difficulty and answer distribution for an exam, read from
+    QuestionStats only. Questions without counters yet report zeros.
+    """
+    questions = Question.objects.filter(exam=exam).select_related('stats').order_by('id')
+    items = []
+    for question in questions:
+        stats = getattr(question, 'stats', None)
+        shown = stats.times_shown if stats else 0
+        answered = stats.times_answered if stats else 0
+        correct = stats.times_correct if stats else 0
+        counts = dict(stats.answer_counts) if stats else {}
+        key = str(question.correct_answer).strip()
+        wrong = sorted(((n, a) for a, n in counts.items() if a != key), reverse=True)
+        top_wrong = wrong[0] if wrong else None
+        items.append({
+            'question_id': question.id,
+            'question_text': question.question_text,
+            'question_type': question.question_type,
+            'correct_answer': question.correct_answer,
+            'times_shown': shown,
+            'times_answered': answered,
+            'times_correct': correct,
+            # Share of students shown the question who got it right
+            'difficulty': round(correct / shown, 3) if shown else None,
+            'omit_rate': round(1 - answered / shown, 3) if shown else None,
+            'top_wrong_answer': top_wrong[1] if top_wrong else None,
+            # A distractor beating the key usually means a wrong or ambiguous key
+            'suspect': bool(shown >= SUSPECT_MIN_SHOWN and top_wrong and top_wrong[0] > correct),
+            'distribution': [
+                {
+                    'answer': answer,
+                    'count': n,
+                    'share': round(n / answered, 3) if answered else 0,
+                    'correct': answer == key,
+                }
+                for answer, n in sorted(counts.items(), key=lambda kv: -kv[1])
+            ],
+        })
+    return items
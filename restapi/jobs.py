@@ -0,0 +1,194 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .certificates import DEFAULT_INSTITUTION, build_exam_certificate, new_certificate_number
+from .gamification import award_points
+from .models import Certificate, CustomUser, Exam, Job, Task, UserActivityLog
+
+logger = logging.getLogger(__name__)
+
+# Side effects of a request (certificates, activity logs, points) are jobs,
+# queued in the database for the run_jobs worker: enqueue() writes the job in
+# the caller's transaction, so workers see it exactly when the request's own
+# write commits and never if it rolls back. Where no worker runs (Vercel, or
+# JOBS_ALWAYS_EAGER) a job runs in the request right after it commits
+# instead, and is only queued if it fails there. A job's handler and its
+# 'done' mark commit together, so handlers that only touch the database run
+# once even if a worker dies mid-job. Failures retry with exponential backoff
+# and end up 'dead' after max_attempts, kept with their last traceback.
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30
+BACKOFF_MAX = 60 * 60
+# A job still 'running' this long after it was claimed belongs to a dead worker
+LOCK_TIMEOUT = 10 * 60
+
+HANDLERS = {}
+
+
+def job(name):
+    """Register a function as the handler for jobs called name."""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, max_attempts=DEFAULT_MAX_ATTEMPTS, **payload):
+    """
+    Queue a job; payload must be JSON-serializable. With JOBS_ALWAYS_EAGER
+    the handler instead runs in-process once the current transaction commits.
+    """
+    if name not in HANDLERS:
+        raise LookupError(f"No job handler named {name!r}")
+    if settings.JOBS_ALWAYS_EAGER:
+        transaction.on_commit(partial(_run_eagerly, name, max_attempts, payload))
+        return None
+    return Job.objects.create(name=name, payload=payload, max_attempts=max_attempts)
+
+
+def _run_eagerly(name, max_attempts, payload):
+    try:
+        with transaction.atomic():
+            HANDLERS[name](**payload)
+    except Exception:
+        # The request has already committed; keep the job for a retry rather than failing the response
+        error = traceback.format_exc()
+        logger.warning("Job %s failed in the request, queued for retry:\n%s", name, error)
+        Job.objects.create(
+            name=name,
+            payload=payload,
+            max_attempts=max_attempts,
+            attempts=1,
+            last_error=error,
+            run_after=timezone.now() + timedelta(seconds=backoff(1)),
+        )
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a job that has failed attempts times."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    # Jitter keeps jobs that failed together from retrying in lockstep
+    return delay + random.uniform(0, delay / 10)
+
+
+def claim_jobs(batch=10, now=None):
+    """
+    Lock up to batch due jobs for this worker, marking them 'running'.
+    Where the backend supports it, rows another worker is claiming are
+    skipped rather than waited on; elsewhere the conditional UPDATE alone
+    keeps two workers from taking the same job.
+    """
+    now = now or timezone.now()
+    due = Job.objects.filter(
+        Q(status='queued', run_after__lte=now)
+        | Q(status='running', locked_at__lt=now - timedelta(seconds=LOCK_TIMEOUT))
+    ).order_by('run_after', 'pk')
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('pk', flat=True)[:batch])
+        if not ids:
+            return []
+        Job.objects.filter(pk__in=ids).filter(
+            Q(status='queued') | Q(status='running', locked_at__lt=now - timedelta(seconds=LOCK_TIMEOUT))
+        ).update(status='running', locked_at=now, attempts=F('attempts') + 1)
+    return list(Job.objects.filter(pk__in=ids, status='running', locked_at=now).order_by('run_after', 'pk'))
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome. Returns True if it succeeded."""
+    mine = Job.objects.filter(pk=job.pk, status='running', locked_at=job.locked_at)
+    try:
+        handler = HANDLERS.get(job.name)
+        if handler is None:
+            raise LookupError(f"No job handler named {job.name!r}")
+        with transaction.atomic():
+            handler(**job.payload)
+            if not mine.update(status='done', locked_at=None, last_error=''):
+                # Reclaimed by another worker after LOCK_TIMEOUT; leave the job to it
+                transaction.set_rollback(True)
+                return False
+        return True
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s failed for the last time:\n%s", job, error)
+            mine.update(status='dead', locked_at=None, last_error=error)
+        else:
+            logger.warning("Job %s failed, attempt %s of %s:\n%s", job, job.attempts, job.max_attempts, error)
+            mine.update(
+                status='queued',
+                locked_at=None,
+                last_error=error,
+                run_after=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+            )
+        return False
+
+
+def run_pending_jobs(batch=10):
+    """Claim and run one batch. Returns (succeeded, failed)."""
+    succeeded = failed = 0
+    for claimed in claim_jobs(batch):
+        if run_job(claimed):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+
+def purge_jobs(older_than):
+    """Delete jobs that finished before the given time; dead jobs are kept for inspection."""
+    deleted, _ = Job.objects.filter(status='done', updated_at__lt=older_than).delete()
+    return deleted
+
+
+# Handlers. Each must be safe to run again after a failed attempt, and
+# runs inside a transaction.
+
+def _lock_holder(user_id):
+    """
+    Lock the user's row for the rest of the transaction, so two jobs issuing
+    the same certificate (a duplicate enqueue, or a retry racing a reclaimed
+    job) take turns and the second sees the first one's certificate.
+    """
+    return CustomUser.objects.select_for_update().get(pk=user_id)
+
+
+@job('issue_exam_certificate')
+def issue_exam_certificate(user_id, exam_id, score):
+    user = _lock_holder(user_id)
+    if Certificate.objects.filter(user_id=user_id, exam_id=exam_id).exists():
+        return
+    build_exam_certificate(user, Exam.objects.get(pk=exam_id), score).save()
+
+
+@job('issue_task_certificate')
+def issue_task_certificate(user_id, task_id, score):
+    user = _lock_holder(user_id)
+    if Certificate.objects.filter(user_id=user_id, task_id=task_id).exists():
+        return
+    task = Task.objects.get(pk=task_id)
+    Certificate.objects.create(
+        user=user,
+        task=task,
+        certificate_number=new_certificate_number('TASK'),
+        name=user.get_full_name() or user.username,
+        institution=DEFAULT_INSTITUTION,
+        score=score,
+    )
+    UserActivityLog.objects.create(
+        user=user,
+        activity_type='certificate_issued',
+        details=f'Certificate issued for Task: {task.name}'
+    )
+
+
+@job('award_points')
+def award_points_job(user_id, points, description):
+    award_points(CustomUser.objects.get(pk=user_id), points, description)
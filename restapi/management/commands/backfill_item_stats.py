@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from restapi.models import Exam
+from restapi.item_stats import rebuild_item_stats, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Recount per-question item statistics from stored exam attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', default=[], help='Exam id to recount (repeatable)')
+        parser.add_argument('--all', action='store_true', help='Recount every exam')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            exams = Exam.objects.all()
+        elif options['exam']:
+            exams = Exam.objects.filter(id__in=options['exam'])
+        else:
+            raise CommandError('Pass --exam or --all.')
+
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive.')
+
+        for exam in exams.order_by('id'):
+            self.stdout.write(f"Counting {exam.name} (#{exam.id})...")
+            seen = rebuild_item_stats(
+                exam.id,
+                chunk_size=chunk_size,
+                progress=lambda n: self.stdout.write(f"  {n} attempts processed"),
+            )
+            self.stdout.write(self.style.SUCCESS(f"  {seen} attempts counted"))
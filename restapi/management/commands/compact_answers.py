@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from restapi.models import Exam
+from restapi.question_pack import convert_stored_answers
+
+
+class Command(BaseCommand):
+    help = "Rewrite the stored answers of finished exam attempts in the compact encoding, or back to plain."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', default=[], help='Exam id to convert (repeatable)')
+        parser.add_argument('--all', action='store_true', help='Convert every exam')
+        parser.add_argument('--expand', action='store_true', help='Write plain answers instead of compact ones')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            exams = Exam.objects.all()
+        elif options['exam']:
+            exams = Exam.objects.filter(id__in=options['exam'])
+        else:
+            raise CommandError('Pass --exam or --all.')
+
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive.')
+
+        for exam in exams.order_by('id'):
+            self.stdout.write(f"Converting {exam.name} (#{exam.id})...")
+            converted = convert_stored_answers(
+                exam.id,
+                compact=not options['expand'],
+                chunk_size=chunk_size,
+                progress=lambda n: self.stdout.write(f"  {n} attempts processed"),
+            )
+            self.stdout.write(self.style.SUCCESS(f"  {converted} attempts rewritten"))
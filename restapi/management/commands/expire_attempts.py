@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from restapi.expiry import expire_overdue_attempts, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Expire overdue in-progress exam attempts and grade whatever answers they saved."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0, help='Keep sweeping every N seconds (0 = run once)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            expired = expire_overdue_attempts(chunk_size=options['chunk_size'])
+            if expired or not interval:
+                self.stdout.write(f"Expired and graded {expired} attempts.")
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from restapi.models import Certificate, Exam
+from restapi.certificates import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_INSTITUTION, issue_certificates, pending_results, prerender_certificates,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Issue certificates for every passed result that lacks one, then pre-render their PDFs "
+        "across a process pool. Safe to rerun after an interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', default=[], help='Exam id to issue for (repeatable)')
+        parser.add_argument('--all', action='store_true', help='Issue for every exam')
+        parser.add_argument('--institution', default=DEFAULT_INSTITUTION)
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count, 1 renders inline)')
+        parser.add_argument('--skip-render', action='store_true', help='Only create the certificate records')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            exam_ids = None
+        elif options['exam']:
+            exam_ids = list(Exam.objects.filter(id__in=options['exam']).values_list('id', flat=True))
+            if not exam_ids:
+                raise CommandError('No matching exams.')
+        else:
+            raise CommandError('Pass --exam or --all.')
+
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive.')
+
+        pending = pending_results(exam_ids).count()
+        self.stdout.write(f"{pending} passed results without a certificate")
+        issued = issue_certificates(
+            exam_ids,
+            institution=options['institution'],
+            chunk_size=chunk_size,
+            progress=lambda n: self.stdout.write(f"  {n}/{pending} certificates issued"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"  {len(issued)} certificates issued"))
+
+        if options['skip_render']:
+            return
+
+        # Covers every certificate of the cohort, so PDFs a previous run never reached are rendered too
+        certificates = Certificate.objects.filter(exam__isnull=False)
+        if exam_ids is not None:
+            certificates = certificates.filter(exam_id__in=exam_ids)
+        self.stdout.write("Rendering PDFs...")
+        rendered = prerender_certificates(
+            certificates,
+            workers=options['workers'],
+            progress=lambda done, total: self.stdout.write(f"  {done}/{total} PDFs rendered"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"  {rendered} PDFs rendered"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from restapi.admission import exams_due_for_prewarm, prewarm_exam
+
+
+class Command(BaseCommand):
+    help = "Warm question pack and answer key caches for exams about to open. Run every few minutes."
+
+    def handle(self, *args, **options):
+        for exam in exams_due_for_prewarm():
+            prewarm_exam(exam)
+            self.stdout.write(f"Prewarmed {exam.name} (#{exam.id}).")
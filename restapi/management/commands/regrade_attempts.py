@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from restapi.models import Exam, Question
+from restapi.regrade import regrade_exam, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Regrade stored exam attempts after questions or answers have been edited."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', default=[], help='Exam id to regrade (repeatable)')
+        parser.add_argument('--question', type=int, action='append', default=[], help='Regrade the exam owning this question (repeatable)')
+        parser.add_argument('--all', action='store_true', help='Regrade every exam')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        exam_ids = set(options['exam'])
+        if options['question']:
+            exam_ids.update(
+                Question.objects.filter(id__in=options['question']).values_list('exam_id', flat=True)
+            )
+
+        if options['all']:
+            exams = Exam.objects.all()
+        elif exam_ids:
+            exams = Exam.objects.filter(id__in=exam_ids)
+        else:
+            raise CommandError('Pass --exam, --question or --all.')
+
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive.')
+
+        for exam in exams.order_by('id'):
+            self.stdout.write(f"Regrading {exam.name} (#{exam.id})...")
+            stats = regrade_exam(
+                exam,
+                chunk_size=chunk_size,
+                progress=lambda s: self.stdout.write(f"  {s.attempts_seen} attempts processed"),
+            )
+            self.stdout.write(self.style.SUCCESS(f"  {stats}"))
@@ -0,0 +1,26 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from restapi.jobs import purge_jobs, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs: certificates, activity logs and points."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run whatever is due, then exit')
+        parser.add_argument('--batch', type=int, default=10, help='Jobs claimed per query')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--keep-days', type=int, default=7, help='Delete finished jobs older than this')
+
+    def handle(self, *args, **options):
+        purge_jobs(timezone.now() - timedelta(days=options['keep_days']))
+        while True:
+            succeeded, failed = run_pending_jobs(options['batch'])
+            if succeeded or failed:
+                self.stdout.write(f"Ran {succeeded + failed} jobs: {succeeded} succeeded, {failed} failed.")
+                continue
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
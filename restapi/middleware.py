@@ -0,0 +1,53 @@
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+class QueryCountMiddleware:
+    """
+    Report the number of SQL queries a request ran in an X-Query-Count header,
+    for load tests and local profiling. Only active with QUERY_COUNT_HEADER
+    on. Sync and async capable, so async views stay async under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_COUNT_HEADER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with _QueryCounter() as counter:
+            response = self.get_response(request)
+        response['X-Query-Count'] = str(counter.count)
+        return response
+
+    async def __acall__(self, request):
+        # ORM calls from async views run in sync_to_async threads, which share this context's connections
+        with _QueryCounter() as counter:
+            response = await self.get_response(request)
+        response['X-Query-Count'] = str(counter.count)
+        return response
+
+
+class _QueryCounter(ExitStack):
+    """Counts queries on every database connection while entered."""
+
+    def __enter__(self):
+        super().__enter__()
+        self.count = 0
+        for conn in connections.all():
+            self.enter_context(conn.execute_wrapper(self._count))
+        return self
+
+    def _count(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0017_resource_link_alter_resource_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='flagged',
+            field=models.BooleanField(default=False, help_text='Set when a regrade drops the holder below the pass score'),
+        ),
+    ]
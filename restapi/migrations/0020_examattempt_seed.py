@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0019_examattempt_status_expires_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='seed',
+            field=models.PositiveIntegerField(blank=True, help_text='Derives the question and option order', null=True),
+        ),
+        migrations.AlterField(
+            model_name='examattempt',
+            name='question_order',
+            field=models.JSONField(blank=True, default=list, help_text='Stored order for attempts created before seeds'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0020_examattempt_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='admission_burst',
+            field=models.PositiveIntegerField(default=0, help_text='Starts admitted at once before throttling (0 = same as rate)'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='admission_rate',
+            field=models.PositiveIntegerField(default=0, help_text='Exam starts admitted per second during the scheduled window (0 = no limit)'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='scheduled_start',
+            field=models.DateTimeField(blank=True, help_text='When a scheduled sitting opens; enables admission control', null=True),
+        ),
+    ]
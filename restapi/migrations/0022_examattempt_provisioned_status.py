@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0021_exam_admission_control'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examattempt',
+            name='status',
+            field=models.CharField(choices=[('provisioned', 'Provisioned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('expired', 'Expired')], default='in_progress', max_length=20),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+
+
+def backfill_attempt_stats(apps, schema_editor):
+    ExamAttempt = apps.get_model('restapi', 'ExamAttempt')
+    ExamAttemptStats = apps.get_model('restapi', 'ExamAttemptStats')
+
+    finished = ExamAttempt.objects.filter(status__in=['completed', 'expired'])
+    latest = finished.filter(user_id=OuterRef('user_id'), exam_id=OuterRef('exam_id')).order_by('-submitted_at', '-pk')
+    rows = finished.values('user_id', 'exam_id').annotate(
+        used=Count('id'),
+        best=Max('score'),
+        any_passed=Count('id', filter=Q(passed=True)),
+        last_id=Subquery(latest.values('pk')[:1]),
+        last_score=Subquery(latest.values('score')[:1]),
+    ).order_by()
+
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(ExamAttemptStats(
+            user_id=row['user_id'],
+            exam_id=row['exam_id'],
+            attempts_used=row['used'],
+            best_score=row['best'],
+            last_score=row['last_score'],
+            last_attempt_id=row['last_id'],
+            passed=row['any_passed'] > 0,
+        ))
+        if len(batch) >= 2000:
+            ExamAttemptStats.objects.bulk_create(batch)
+            batch = []
+    ExamAttemptStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0022_examattempt_provisioned_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAttemptStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts_used', models.PositiveIntegerField(default=0, help_text='Completed or expired attempts')),
+                ('best_score', models.FloatField(blank=True, null=True)),
+                ('last_score', models.FloatField(blank=True, null=True)),
+                ('passed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_stats', to='restapi.exam')),
+                ('last_attempt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='restapi.examattempt')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Exam attempt stats',
+                'unique_together': {('user', 'exam')},
+            },
+        ),
+        migrations.RunPython(backfill_attempt_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0023_examattemptstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProctoringEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('tab_hidden', 'Tab Hidden'), ('focus_lost', 'Focus Lost'), ('fullscreen_exit', 'Exited Fullscreen'), ('resumed', 'Resumed'), ('terminated', 'Terminated')], max_length=20)),
+                ('occurred_at', models.DateTimeField()),
+                ('warning_count', models.PositiveSmallIntegerField(default=0)),
+                ('attempt', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='proctoring_events', to='restapi.examattempt')),
+            ],
+            options={
+                'ordering': ['occurred_at'],
+                'indexes': [models.Index(fields=['attempt', 'occurred_at'], name='proctoring_attempt_time')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0024_proctoringevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='restapi.question')),
+                ('times_shown', models.PositiveIntegerField(default=0)),
+                ('times_answered', models.PositiveIntegerField(default=0)),
+                ('times_correct', models.PositiveIntegerField(default=0)),
+                ('answer_counts', models.JSONField(blank=True, default=dict, help_text='Submitted answer -> count')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Question stats',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+# This migration used to convert existing answers when EXAM_COMPACT_ANSWERS
+# was on, so the same migration left different data depending on settings.
+# It is now a no-op either way; existing attempts are converted, in chunks
+# and re-runnably, with `manage.py compact_answers --all` (or `--expand`
+# to go back). Databases where it already ran are left as they are.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0025_questionstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 1000
+
+
+def fill_certificate_keys(apps, schema_editor):
+    # Historical models have no custom save(), so the key is computed here
+    Certificate = apps.get_model('restapi', 'Certificate')
+    last_pk = 0
+    while True:
+        chunk = list(
+            Certificate.objects.filter(pk__gt=last_pk).order_by('pk').only('id', 'certificate_number')[:CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        for certificate in chunk:
+            certificate.certificate_key = (certificate.certificate_number or '').strip().upper()
+        Certificate.objects.bulk_update(chunk, ['certificate_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0026_compact_exam_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='certificate_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_certificate_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0027_certificate_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='revoked',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='revoked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 1000
+
+
+def _ranges(ids):
+    ranges = []
+    for qid in sorted(set(ids)):
+        if ranges and qid == ranges[-1][1] + 1:
+            ranges[-1][1] = qid
+        else:
+            ranges.append([qid, qid])
+    return ranges
+
+
+def fill_question_sets(apps, schema_editor):
+    # Compact answers carry the set they were encoded against in "r"; for
+    # anything else the exam's current questions are the best record left
+    ExamAttempt = apps.get_model('restapi', 'ExamAttempt')
+    Question = apps.get_model('restapi', 'Question')
+    current = {}
+    attempts = ExamAttempt.objects.filter(seed__isnull=False, question_set__isnull=True).only(
+        'id', 'exam_id', 'question_order', 'answers'
+    )
+    last_pk = 0
+    while True:
+        chunk = list(attempts.filter(pk__gt=last_pk).order_by('pk')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        missing = {a.exam_id for a in chunk} - set(current)
+        for exam_id in missing:
+            current[exam_id] = []
+        for qid, exam_id in Question.objects.filter(exam_id__in=missing).values_list('id', 'exam_id'):
+            current[exam_id].append(qid)
+        changed = []
+        for attempt in chunk:
+            if attempt.question_order:
+                continue
+            answers = attempt.answers
+            if isinstance(answers, dict) and answers.get('_v') == 1:
+                attempt.question_set = answers.get('r') or []
+            else:
+                attempt.question_set = _ranges(current[attempt.exam_id])
+            changed.append(attempt)
+        ExamAttempt.objects.bulk_update(changed, ['question_set'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0029_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='question_set',
+            field=models.JSONField(blank=True, help_text='Ids of the questions shown, as [first, last] ranges; the seed orders them', null=True),
+        ),
+        migrations.RunPython(fill_question_sets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:58
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 1000
+
+
+# Copies of restapi.answer_codec as of this migration, so later changes to
+# the live codec cannot change what it writes
+def _unpack_ranges(ranges):
+    ids = []
+    for first, last in ranges or []:
+        ids.extend(range(first, last + 1))
+    return ids
+
+
+def _snapshot_digest(snapshot):
+    payload = json.dumps(snapshot, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def snapshot_existing_answers(apps, schema_editor):
+    # Compact answers written so far point into the live options; pin them to
+    # the options as they are now, the closest record of what was encoded
+    ExamAttempt = apps.get_model('restapi', 'ExamAttempt')
+    Question = apps.get_model('restapi', 'Question')
+    AnswerOptionSnapshot = apps.get_model('restapi', 'AnswerOptionSnapshot')
+    options = {}
+    attempts = ExamAttempt.objects.only('id', 'exam_id', 'answers')
+    last_pk = 0
+    while True:
+        chunk = list(attempts.filter(pk__gt=last_pk).order_by('pk')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        missing = {a.exam_id for a in chunk} - set(options)
+        for exam_id in missing:
+            options[exam_id] = {}
+        rows = Question.objects.filter(exam_id__in=missing).values_list('id', 'exam_id', 'question_type', 'options')
+        for qid, exam_id, qtype, opts in rows:
+            opts = list(opts or [])
+            if qtype == 'true_false' and not opts:
+                opts = ['True', 'False']
+            options[exam_id][qid] = opts
+
+        snapshots = {}
+        changed = []
+        for attempt in chunk:
+            answers = attempt.answers
+            if not (isinstance(answers, dict) and answers.get('_v') == 1) or answers.get('s'):
+                continue
+            by_id = options[attempt.exam_id]
+            snapshot = {str(qid): list(by_id.get(qid) or []) for qid in _unpack_ranges(answers.get('r'))}
+            digest = _snapshot_digest(snapshot)
+            snapshots[digest] = snapshot
+            attempt.answers = dict(answers, s=digest)
+            changed.append(attempt)
+        AnswerOptionSnapshot.objects.bulk_create(
+            [AnswerOptionSnapshot(digest=digest, options=snapshot) for digest, snapshot in snapshots.items()],
+            ignore_conflicts=True,
+        )
+        ExamAttempt.objects.bulk_update(changed, ['answers'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0030_examattempt_question_set'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerOptionSnapshot',
+            fields=[
+                ('digest', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('options', models.JSONField(help_text='Question id -> options at encoding time')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # Reversing leaves "s" in place; older code ignores it
+        migrations.RunPython(snapshot_existing_answers, migrations.RunPython.noop),
+    ]
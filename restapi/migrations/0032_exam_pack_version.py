@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restapi', '0031_answer_option_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='pack_version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Bumped whenever a question changes; versions the cached question pack'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = [
@@ -120,8 +121,12 @@ class Exam(models.Model):
     duration_minutes = models.PositiveIntegerField(default=30, help_text="Exam duration in minutes")
     pass_score = models.FloatField(default=60.0, validators=[MinValueValidator(0.0), MaxValueValidator(100.0)], help_text="Minimum score to pass (%)")
     max_attempts = models.PositiveIntegerField(default=3, help_text="Maximum attempts per user (0 = unlimited)")
+    scheduled_start = models.DateTimeField(null=True, blank=True, help_text="When a scheduled sitting opens; enables admission control")
+    admission_rate = models.PositiveIntegerField(default=0, help_text="Exam starts admitted per second during the scheduled window (0 = no limit)")
+    admission_burst = models.PositiveIntegerField(default=0, help_text="Starts admitted at once before throttling (0 = same as rate)")
     created_by = models.ForeignKey(Mentor, on_delete=models.CASCADE, related_name='created_exams')
     assigned_to = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='assigned_exams', null=True, blank=True)
+    pack_version = models.PositiveIntegerField(default=1, editable=False, help_text="Bumped whenever a question changes; versions the cached question pack")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -142,6 +147,30 @@ class Question(models.Model):
     def __str__(self):
         return self.question_text[:50]
 
+class QuestionStats(models.Model):
+    """Running item-analysis counters for a question, folded in as attempts are graded."""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    times_shown = models.PositiveIntegerField(default=0)
+    times_answered = models.PositiveIntegerField(default=0)
+    times_correct = models.PositiveIntegerField(default=0)
+    answer_counts = models.JSONField(default=dict, blank=True, help_text="Submitted answer -> count")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Question stats'
+
+    def __str__(self):
+        return f"Stats for question {self.question_id}: {self.times_correct}/{self.times_shown} correct"
+
+class AnswerOptionSnapshot(models.Model):
+    """Question options as compact answers were encoded against; see restapi/answer_codec.py."""
+    digest = models.CharField(max_length=32, primary_key=True)
+    options = models.JSONField(help_text="Question id -> options at encoding time")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Answer options {self.digest}"
+
 class Result(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='results')
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='results')
@@ -158,6 +187,7 @@ class Result(models.Model):
 
 class ExamAttempt(models.Model):
     STATUS_CHOICES = [
+        ('provisioned', 'Provisioned'),
         ('in_progress', 'In Progress'),
         ('completed', 'Completed'),
         ('expired', 'Expired'),
@@ -175,7 +205,11 @@ class ExamAttempt(models.Model):
     score = models.FloatField(null=True, blank=True, validators=[MinValueValidator(0.0), MaxValueValidator(100.0)])
     passed = models.BooleanField(default=False)
 
-    question_order = models.JSONField(default=list, blank=True)
+    question_order = models.JSONField(default=list, blank=True, help_text="Stored order for attempts created before seeds")
+    seed = models.PositiveIntegerField(null=True, blank=True, help_text="Derives the question and option order")
+    question_set = models.JSONField(
+        null=True, blank=True, help_text="Ids of the questions shown, as [first, last] ranges; the seed orders them"
+    )
     answers = models.JSONField(default=dict, blank=True)
 
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -184,10 +218,62 @@ class ExamAttempt(models.Model):
     class Meta:
         unique_together = ('user', 'exam', 'attempt_number')
         ordering = ['-started_at']
+        indexes = [
+            # Keeps the expiry sweep an index range scan as the table grows
+            models.Index(fields=['status', 'expires_at'], name='examattempt_status_expires'),
+        ]
 
     def __str__(self):
         return f"Attempt {self.attempt_number} - {self.user.username} - {self.exam.name}"
 
+class ExamAttemptStats(models.Model):
+    """Per-user, per-exam attempt summary kept in step with ExamAttempt."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='exam_stats')
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='attempt_stats')
+    attempts_used = models.PositiveIntegerField(default=0, help_text="Completed or expired attempts")
+    best_score = models.FloatField(null=True, blank=True)
+    last_score = models.FloatField(null=True, blank=True)
+    last_attempt = models.ForeignKey(ExamAttempt, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    passed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'exam')
+        verbose_name_plural = 'Exam attempt stats'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.exam.name}: {self.attempts_used} attempts"
+
+class ProctoringEvent(models.Model):
+    """Append-only log of client-side proctoring events, read per attempt."""
+    EVENT_CHOICES = [
+        ('tab_hidden', 'Tab Hidden'),
+        ('focus_lost', 'Focus Lost'),
+        ('fullscreen_exit', 'Exited Fullscreen'),
+        ('resumed', 'Resumed'),
+        ('terminated', 'Terminated'),
+    ]
+
+    # The (attempt, occurred_at) index covers lookups by attempt on its own
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='proctoring_events', db_index=False)
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    occurred_at = models.DateTimeField()
+    warning_count = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['occurred_at']
+        indexes = [
+            models.Index(fields=['attempt', 'occurred_at'], name='proctoring_attempt_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} at {self.occurred_at:%H:%M:%S} (attempt {self.attempt_id})"
+
+def normalize_certificate_number(value):
+    """Lookup form of a certificate number: verification is case-insensitive and ignores stray whitespace."""
+    return (value or '').strip().upper()
+
+
 class Certificate(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='certificates')
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='certificates', null=True, blank=True)
@@ -197,6 +283,23 @@ class Certificate(models.Model):
     name = models.CharField(max_length=200, help_text="Full name on certificate", null=True, blank=True)
     institution = models.CharField(max_length=200, help_text="Institution name", null=True, blank=True)
     score = models.FloatField(validators=[MinValueValidator(0.0), MaxValueValidator(100.0)], help_text="Score achieved", null=True, blank=True)
+    flagged = models.BooleanField(default=False, help_text="Set when a regrade drops the holder below the pass score")
+    # certificate_number normalized, so verification is an index lookup instead of iexact
+    certificate_key = models.CharField(max_length=100, db_index=True, editable=False, default='')
+    revoked = models.BooleanField(default=False, db_index=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        self.certificate_key = normalize_certificate_number(self.certificate_number)
+        # Revoking by editing the flag (e.g. in the admin form) stamps the time too
+        if self.revoked and self.revoked_at is None:
+            self.revoked_at = timezone.now()
+        elif not self.revoked:
+            self.revoked_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'certificate_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'certificate_key'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         subject = self.exam.name if self.exam else (self.task.name if self.task else "General")
@@ -263,3 +366,32 @@ class SampleQuestion(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+class Job(models.Model):
+    """A side effect queued for the run_jobs worker; see restapi.jobs."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: queued jobs that are due, oldest first
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.utils import timezone
+from .models import ProctoringEvent
+
+# The exam page buffers events and sends them in batches; anything larger than
+# this is not a real client and is cut off rather than written.
+MAX_BATCH = 200
+# Batches flushed on submit or page unload can land just after the attempt ends
+LATE_GRACE = timedelta(minutes=5)
+
+EVENT_TYPES = {value for value, _ in ProctoringEvent.EVENT_CHOICES}
+
+
+def accepts_events(attempt, now=None):
+    if attempt.status == 'provisioned':
+        return False
+    now = now or timezone.now()
+    ended = attempt.submitted_at or attempt.expires_at
+    return now <= ended + LATE_GRACE
+
+
+def _occurred_at(value, attempt, now):
+    """Client epoch milliseconds, clamped to the attempt so clock skew cannot reorder timelines."""
+    try:
+        when = datetime.fromtimestamp(float(value) / 1000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return now
+    return min(max(when, attempt.started_at), now)
+
+
+def build_events(attempt, raw_events, now=None):
+    """Unsaved ProctoringEvents for the well-formed entries of a client batch."""
+    now = now or timezone.now()
+    events = []
+    for raw in raw_events[:MAX_BATCH]:
+        if not isinstance(raw, dict) or raw.get('type') not in EVENT_TYPES:
+            continue
+        try:
+            warnings = max(0, min(int(raw.get('warnings') or 0), 32767))
+        except (TypeError, ValueError):
+            warnings = 0
+        events.append(ProctoringEvent(
+            attempt_id=attempt.id,
+            event_type=raw['type'],
+            occurred_at=_occurred_at(raw.get('at'), attempt, now),
+            warning_count=warnings,
+        ))
+    return events
+
+
+def record_events(attempt, raw_events, now=None):
+    """Append a client batch with a single INSERT; returns the number written."""
+    events = build_events(attempt, raw_events, now)
+    ProctoringEvent.objects.bulk_create(events)
+    return len(events)
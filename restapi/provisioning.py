@@ -0,0 +1,86 @@
+from collections import Counter
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from .models import CustomUser, ExamAttempt
+from .question_pack import new_seed
+
+
+def exam_roster(exam):
+    """Students expected to sit an exam: its assignee, else the creating mentor's students."""
+    if exam.assigned_to_id:
+        return CustomUser.objects.filter(id=exam.assigned_to_id)
+    return CustomUser.objects.filter(mentor_id=exam.created_by_id, role='user', is_active=True)
+
+
+def provision_attempts(exam, user_ids):
+    """
+    Pre-create 'provisioned' attempts, with attempt numbers and seeds, for a
+    cohort in one bulk_create so start_exam only has to flip them to in_progress.
+    Every requested id that gets no attempt is counted under a reason: no
+    such user, staff, not the exam's assignee, already holding an open
+    attempt, no retakes left, or an attempt numbered concurrently
+    (conflict). Raises ValueError for an exam without questions. Returns
+    (created, skipped), skipped a Counter of reasons.
+    """
+    if not exam.questions.exists():
+        raise ValueError('This exam has no questions to provision attempts for.')
+
+    requested = set(user_ids)
+    staff = dict(CustomUser.objects.filter(id__in=requested).values_list('id', 'is_staff'))
+    skipped = Counter()
+    user_ids = set()
+    for user_id in requested:
+        if user_id not in staff:
+            skipped['not_found'] += 1
+        elif staff[user_id]:
+            skipped['staff'] += 1
+        elif exam.assigned_to_id and user_id != exam.assigned_to_id:
+            skipped['not_assigned'] += 1
+        else:
+            user_ids.add(user_id)
+
+    usage = {
+        row['user_id']: row
+        for row in ExamAttempt.objects.filter(exam=exam, user_id__in=user_ids)
+        .values('user_id')
+        .annotate(
+            used=Count('id', filter=Q(status__in=['completed', 'expired'])),
+            open=Count('id', filter=Q(status__in=['provisioned', 'in_progress'])),
+            last_number=Max('attempt_number'),
+        )
+    }
+
+    now = timezone.now()
+    max_attempts = int(exam.max_attempts or 0)
+    attempts = []
+    for user_id in sorted(user_ids):
+        row = usage.get(user_id, {'used': 0, 'open': 0, 'last_number': 0})
+        if row['open']:
+            skipped['open_attempt'] += 1
+            continue
+        if max_attempts > 0 and row['used'] >= max_attempts:
+            skipped['no_attempts_left'] += 1
+            continue
+        attempts.append(ExamAttempt(
+            user_id=user_id,
+            exam=exam,
+            attempt_number=(row['last_number'] or 0) + 1,
+            status='provisioned',
+            # Placeholder; the real window is set when the student starts
+            expires_at=now,
+            seed=new_seed(),
+        ))
+
+    ExamAttempt.objects.bulk_create(attempts, ignore_conflicts=True)
+    # A concurrent start or provisioning may have taken the same attempt
+    # number in the meantime, and ignore_conflicts drops those rows silently;
+    # the seeds tell our rows from theirs
+    ours = {(a.user_id, a.seed) for a in attempts}
+    created = sum(
+        1 for row in ExamAttempt.objects.filter(exam=exam, user_id__in={a.user_id for a in attempts})
+        .values_list('user_id', 'seed')
+        if row in ours
+    )
+    if created < len(attempts):
+        skipped['conflict'] += len(attempts) - created
+    return created, skipped
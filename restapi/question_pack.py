@@ -0,0 +1,258 @@
+import hashlib
+import secrets
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from .models import AnswerOptionSnapshot, Exam, ExamAttempt, Question
+from .answer_codec import (
+    decode_answers, encode_answers, encoded_question_ids, is_compact, options_snapshot, pack_ranges,
+    snapshot_options, unpack_ranges,
+)
+
+# Packs and answer keys are cached under the exam's pack_version; bumping the
+# version orphans every older entry, so invalidation never has to know old keys.
+# The version lives on the Exam row rather than in the cache, so every process
+# sees a bump as soon as the question change that caused it commits.
+PACK_TIMEOUT = 60 * 60 * 24
+
+
+def _pack_key(exam_id, version):
+    return f"exam:{exam_id}:pack:{version}"
+
+
+def get_pack_version(exam_id):
+    return Exam.objects.filter(pk=exam_id).values_list('pack_version', flat=True).first() or 1
+
+
+def invalidate_question_pack(exam_id):
+    """Drop every cached pack for an exam by moving to a new version."""
+    Exam.objects.filter(pk=exam_id).update(pack_version=F('pack_version') + 1)
+
+
+def build_question_pack(exam_id):
+    """
+    Build the student-facing payload for every question of an exam.
+    Correct answers are deliberately left out.
+    """
+    questions = []
+    rows = Question.objects.filter(exam_id=exam_id).order_by('id').values_list(
+        'id', 'question_text', 'question_type', 'options'
+    )
+    for qid, text, qtype, options in rows:
+        opts = list(options or [])
+        # Fix for True/False questions: ensure options exist
+        if qtype == 'true_false' and not opts:
+            opts = ['True', 'False']
+        questions.append({
+            'id': qid,
+            'question_text': text,
+            'question_type': qtype,
+            'options': opts,
+        })
+    return questions
+
+
+def get_question_pack(exam_id, version=None):
+    """
+    Return the cached question pack for an exam, building it on a miss.
+    Callers holding the Exam row pass its pack_version, which saves a query.
+    """
+    key = _pack_key(exam_id, version or get_pack_version(exam_id))
+    pack = cache.get(key)
+    if pack is None:
+        pack = build_question_pack(exam_id)
+        cache.set(key, pack, PACK_TIMEOUT)
+    return pack
+
+
+def new_seed():
+    return secrets.randbits(31)
+
+
+def _seeded_key(seed, *parts):
+    # Sorting by a keyed hash gives a per-attempt permutation that stays stable
+    # for the remaining items when a question or option is added or removed.
+    data = ':'.join(str(p) for p in (seed,) + parts).encode()
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+def seeded_question_order(question_ids, seed):
+    return sorted(question_ids, key=lambda qid: _seeded_key(seed, qid))
+
+
+def question_set_for(pack):
+    """The ExamAttempt.question_set value for an attempt shown this pack."""
+    return pack_ranges(q['id'] for q in pack)
+
+
+def question_order_for(attempt, question_ids=()):
+    """
+    Presented question order of an attempt: stored for attempts created before
+    seeds, otherwise derived from the seed and the ids the attempt was shown,
+    so questions added later never count against it. question_ids, the
+    exam's current ids, only stands in for attempts that predate
+    question_set and have no compact answers to read the set from.
+    """
+    if attempt.question_order:
+        return list(attempt.question_order)
+    if attempt.seed is None:
+        return []
+    if attempt.question_set is not None:
+        shown = unpack_ranges(attempt.question_set)
+    elif is_compact(attempt.answers):
+        shown = encoded_question_ids(attempt.answers)
+    else:
+        shown = question_ids
+    return seeded_question_order(shown, attempt.seed)
+
+
+def pack_payload(pack, question_ids, seed=None):
+    """
+    Lay the pack out in the given question order, skipping ids that no longer
+    exist. With a seed, options are put in that attempt's fixed order.
+    """
+    by_id = {q['id']: q for q in pack}
+    payload = []
+    for qid in question_ids:
+        q = by_id.get(qid)
+        if not q:
+            continue
+        opts = list(q['options'])
+        if opts and seed is not None:
+            opts.sort(key=lambda opt: _seeded_key(seed, qid, opt))
+        payload.append(dict(q, options=opts))
+    return payload
+
+
+def normalize_answer(value):
+    return str(value).strip()
+
+
+def _answer_key_key(exam_id, version):
+    return f"exam:{exam_id}:answer_key:{version}"
+
+
+def build_answer_key(exam_id):
+    """Map question id -> normalized correct answer for an exam."""
+    rows = Question.objects.filter(exam_id=exam_id).values_list('id', 'correct_answer')
+    return {qid: normalize_answer(correct) for qid, correct in rows}
+
+
+def get_answer_key(exam_id, version=None):
+    """Return the cached answer key for an exam; takes the pack version like get_question_pack."""
+    key = _answer_key_key(exam_id, version or get_pack_version(exam_id))
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = build_answer_key(exam_id)
+        cache.set(key, answer_key, PACK_TIMEOUT)
+    return answer_key
+
+
+def _options_by_id(pack):
+    return {q['id']: q['options'] for q in pack}
+
+
+# Snapshots are immutable and named by their content, so caching them
+# anywhere, and remembering which ones exist, can never go stale.
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+MAX_SAVED_SNAPSHOTS = 10000
+_saved_snapshots = set()
+
+
+def _snapshot_key(digest):
+    return f"answer_options:{digest}"
+
+
+def save_options_snapshot(digest, snapshot):
+    if digest in _saved_snapshots:
+        return
+    AnswerOptionSnapshot.objects.get_or_create(digest=digest, defaults={'options': snapshot})
+    if len(_saved_snapshots) >= MAX_SAVED_SNAPSHOTS:
+        _saved_snapshots.clear()
+    # Only once the row is committed; a rolled-back snapshot must be written again
+    transaction.on_commit(lambda: _saved_snapshots.add(digest))
+
+
+def load_options_snapshot(digest):
+    """options_by_id of a stored snapshot, or None if it is missing."""
+    options = cache.get(_snapshot_key(digest))
+    if options is None:
+        snapshot = AnswerOptionSnapshot.objects.filter(digest=digest).values_list('options', flat=True).first()
+        if snapshot is None:
+            return None
+        options = snapshot_options(snapshot)
+        cache.set(_snapshot_key(digest), options, SNAPSHOT_TIMEOUT)
+    return options
+
+
+def stored_answers(answers, question_ids, pack):
+    """
+    The value to keep in ExamAttempt.answers for plain {id: text} answers,
+    compact when EXAM_COMPACT_ANSWERS is on. question_ids is the presented order.
+    """
+    answers = {str(k): v for k, v in answers.items()}
+    if not getattr(settings, 'EXAM_COMPACT_ANSWERS', False):
+        return answers
+    options_by_id = _options_by_id(pack)
+    stored = encode_answers(answers, question_ids, options_by_id)
+    save_options_snapshot(stored['s'], options_snapshot(question_ids, options_by_id))
+    return stored
+
+
+def attempt_answers(attempt, pack=None):
+    """Plain {str id: text} answers of an attempt, whichever format they are stored in."""
+    stored = attempt.answers
+    if not is_compact(stored):
+        return dict(stored or {})
+    options_by_id = load_options_snapshot(stored['s']) if stored.get('s') else None
+    if options_by_id is None:
+        if pack is None:
+            pack = get_question_pack(attempt.exam_id)
+        options_by_id = _options_by_id(pack)
+    question_ids = question_order_for(attempt, encoded_question_ids(stored))
+    return decode_answers(stored, question_ids, options_by_id)
+
+
+def convert_stored_answers(exam_id, compact=True, chunk_size=1000, progress=None):
+    """
+    Rewrite the stored answers of an exam's finished attempts compact (with
+    their options snapshot) or, with compact=False, plain again. Attempts
+    already in that format are left alone, so it can be re-run after an
+    interruption. Attempts with neither a stored order nor a seed have no
+    order to encode against and stay plain. Returns how many were rewritten;
+    progress, if given, is called with the attempts processed so far.
+    """
+    pack = get_question_pack(exam_id)
+    question_ids = [q['id'] for q in pack]
+    options_by_id = _options_by_id(pack)
+    attempts = ExamAttempt.objects.filter(exam_id=exam_id, status__in=['completed', 'expired']).only(
+        'id', 'exam_id', 'question_order', 'seed', 'question_set', 'answers'
+    )
+    seen = converted = 0
+    last_pk = 0
+    while True:
+        chunk = list(attempts.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        changed = []
+        with transaction.atomic():
+            for attempt in chunk:
+                if not attempt.answers or is_compact(attempt.answers) == compact:
+                    continue
+                if compact:
+                    order = question_order_for(attempt, question_ids)
+                    if not order:
+                        continue
+                    attempt.answers = encode_answers(attempt.answers, order, options_by_id)
+                    save_options_snapshot(attempt.answers['s'], options_snapshot(order, options_by_id))
+                else:
+                    attempt.answers = attempt_answers(attempt, pack)
+                changed.append(attempt)
+            ExamAttempt.objects.bulk_update(changed, ['answers'])
+        seen += len(chunk)
+        converted += len(changed)
+        if progress:
+            progress(seen)
+    return converted
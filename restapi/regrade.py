@@ -0,0 +1,141 @@
+import time
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from .models import ExamAttempt, Result, Certificate
+from .question_pack import build_answer_key, get_question_pack, question_order_for, attempt_answers
+from .grading import grade_many, normalize_answers
+from .certificates import build_exam_certificate
+from .attempt_stats import rebuild_exam_stats
+from .item_stats import ItemTally, replace_item_stats
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class RegradeStats:
+    def __init__(self):
+        self.attempts_seen = 0
+        self.attempts_changed = 0
+        self.results_changed = 0
+        self.certificates_issued = 0
+        self.certificates_flagged = 0
+        self.elapsed = 0.0
+
+    @property
+    def attempts_per_second(self):
+        return self.attempts_seen / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.attempts_seen} attempts regraded ({self.attempts_changed} changed), "
+            f"{self.results_changed} results updated, {self.certificates_issued} certificates issued, "
+            f"{self.certificates_flagged} flagged in {self.elapsed:.2f}s "
+            f"({self.attempts_per_second:.0f} attempts/s)"
+        )
+
+
+def _chunks_by_pk(queryset, chunk_size):
+    # Keyset pagination keeps each chunk an indexed range scan and never
+    # holds more than chunk_size rows in memory.
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def regrade_exam(exam, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Re-score every graded attempt of an exam from its stored answers, then
+    bring Result rows and certificates in line with the new scores.
+    """
+    stats = RegradeStats()
+    item_tally = ItemTally()
+    started = time.monotonic()
+    answer_key = build_answer_key(exam.id)
+    question_ids = list(answer_key)
+    pack = get_question_pack(exam.id, exam.pack_version)
+    pass_score = float(exam.pass_score)
+
+    # Expired attempts that were never submitted have no score; leave them alone
+    attempts = ExamAttempt.objects.filter(exam=exam, score__isnull=False).only(
+        'id', 'question_order', 'seed', 'question_set', 'answers', 'score', 'passed'
+    )
+    for chunk in _chunks_by_pk(attempts, chunk_size):
+        orders = [question_order_for(a, question_ids) for a in chunk]
+        answers = [attempt_answers(a, pack) for a in chunk]
+        scores = grade_many(answer_key, zip(orders, answers))
+        changed = []
+        for attempt, order, plain, score in zip(chunk, orders, answers, scores):
+            item_tally.add(answer_key, order, normalize_answers(plain))
+            passed = score >= pass_score
+            if attempt.score != score or attempt.passed != passed:
+                attempt.score = score
+                attempt.passed = passed
+                changed.append(attempt)
+        if changed:
+            ExamAttempt.objects.bulk_update(changed, ['score', 'passed'])
+        stats.attempts_seen += len(chunk)
+        stats.attempts_changed += len(changed)
+        if progress:
+            progress(stats)
+
+    # Result is the latest-attempt summary, so re-derive it from the newest graded attempt
+    latest = ExamAttempt.objects.filter(
+        user_id=OuterRef('user_id'), exam_id=exam.id, score__isnull=False
+    ).order_by('-submitted_at', '-pk')
+    results = Result.objects.filter(exam=exam).select_related('user').annotate(
+        latest_score=Subquery(latest.values('score')[:1]),
+    )
+    for chunk in _chunks_by_pk(results, chunk_size):
+        _sync_results_chunk(exam, chunk, pass_score, stats)
+
+    rebuild_exam_stats(exam.id)
+    # The key changed, so correctness counts are recounted from the same pass
+    replace_item_stats(exam.id, item_tally)
+    stats.elapsed = time.monotonic() - started
+    return stats
+
+
+def _sync_results_chunk(exam, results, pass_score, stats):
+    changed = []
+    for result in results:
+        if result.latest_score is None:
+            continue
+        passed = result.latest_score >= pass_score
+        if result.score != result.latest_score or result.passed != passed:
+            result.score = result.latest_score
+            result.passed = passed
+            changed.append(result)
+
+    certificates = {
+        c.user_id: c for c in Certificate.objects.filter(exam=exam, user_id__in=[r.user_id for r in results])
+    }
+    to_create = []
+    to_update = []
+    for result in results:
+        certificate = certificates.get(result.user_id)
+        if certificate is None:
+            if result.passed:
+                to_create.append(build_exam_certificate(result.user, exam, result.score))
+            continue
+        flagged = not result.passed
+        if certificate.flagged != flagged or (result.passed and certificate.score != result.score):
+            if flagged and not certificate.flagged:
+                stats.certificates_flagged += 1
+            certificate.flagged = flagged
+            if result.passed:
+                certificate.score = result.score
+            to_update.append(certificate)
+
+    # bulk_update skips post_save, so no points are re-awarded for a regrade
+    with transaction.atomic():
+        if changed:
+            Result.objects.bulk_update(changed, ['score', 'passed'])
+        if to_update:
+            Certificate.objects.bulk_update(to_update, ['flagged', 'score'])
+        if to_create:
+            Certificate.objects.bulk_create(to_create)
+    stats.results_changed += len(changed)
+    stats.certificates_issued += len(to_create)
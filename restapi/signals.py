@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Submission, Result
-from .gamification import award_points
+from .models import Submission, Result, Question, Certificate
+from .jobs import enqueue
+from .question_pack import invalidate_question_pack
+from .verification import forget_certificate
 
 @receiver(post_save, sender=Submission)
 def award_points_for_submission(sender, instance, created, **kwargs):
@@ -11,11 +13,27 @@ def award_points_for_submission(sender, instance, created, **kwargs):
         # A more robust system would need a dedicated 'PointTransaction' model.
         
         # Award 10 points for a task submission approval
-        award_points(instance.submitted_by, 10, f"Task Approved: {instance.task.name}")
+        enqueue('award_points', user_id=instance.submitted_by_id, points=10, description=f"Task Approved: {instance.task.name}")
 
 @receiver(post_save, sender=Result)
 def award_points_for_exam(sender, instance, created, **kwargs):
     print(f"Signal failed: {instance}")
     if instance.passed:
         # Award 50 points for passing an exam
-        award_points(instance.user, 50, f"Exam Passed: {instance.exam.name}")
+        enqueue('award_points', user_id=instance.user_id, points=50, description=f"Exam Passed: {instance.exam.name}")
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_exam_question_pack(sender, instance, **kwargs):
+    # Covers add_questions_view, edit_question_view, delete_question_view and the admin
+    invalidate_question_pack(instance.exam_id)
+
+@receiver(post_save, sender=Certificate)
+def forget_saved_certificate(sender, instance, **kwargs):
+    # bulk_create() skips this, but bulk-issued numbers are fresh and cannot have been cached yet
+    forget_certificate(instance.certificate_number, revoked=instance.revoked)
+
+
+@receiver(post_delete, sender=Certificate)
+def forget_deleted_certificate(sender, instance, **kwargs):
+    forget_certificate(instance.certificate_number)
@@ -1,8 +1,10 @@
 from django.urls import path, include
 from django.views.generic import RedirectView, TemplateView
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
-    RegisterView, LoginView, LogoutView, UserViewSet, MentorViewSet,
+    RegisterView, LoginView, LogoutView, BulkVerifyCertificatesView, VerifyCertificateTokenView,
+    UserViewSet, MentorViewSet,
     TaskViewSet, SubmissionViewSet, ExamViewSet, QuestionViewSet,
     ResultViewSet, CertificateViewSet,
     login_view, register_view, mentor_register_view, dashboard_view, logout_view, exams_view, certificates_view,
@@ -10,7 +12,7 @@ from .views import (
     manage_tasks_view, manage_submissions_view, manage_exams_view, manage_certificates_view, profile_view,
     submit_task_view, review_submission_view, assign_tasks_view, mentor_dashboard_view,
     sample_questions_topics_view, sample_questions_view, verify_certificate_view,
-    create_exam_view, add_questions_view, delete_question_view,
+    create_exam_view, add_questions_view, delete_question_view, item_analysis_view,
     edit_exam_view, delete_exam_view, edit_question_view, activity_log_view,
     leaderboard_view, resource_library_view, upload_resource_view,
     leaderboard_view, resource_library_view, upload_resource_view,
@@ -75,6 +77,7 @@ urlpatterns = [
     path('manage-exams/<int:exam_id>/edit/', edit_exam_view, name='edit_exam'),
     path('manage-exams/<int:exam_id>/delete/', delete_exam_view, name='delete_exam'),
     path('manage-exams/<int:exam_id>/add-questions/', add_questions_view, name='add_questions'),
+    path('manage-exams/<int:exam_id>/item-analysis/', item_analysis_view, name='item_analysis'),
     path('manage-exams/question/<int:question_id>/edit/', edit_question_view, name='edit_question'),
     path('exams/delete-question/<int:question_id>/', delete_question_view, name='delete_question'),
     path('manage-certificates/', manage_certificates_view, name='manage_certificates'),
@@ -84,5 +87,11 @@ urlpatterns = [
     path('api/register/', RegisterView.as_view(), name='api_register'),
     path('api/login/', LoginView.as_view(), name='api_login'),
     path('api/logout/', LogoutView.as_view(), name='api_logout'),
+    path('api/verify-certificates/', BulkVerifyCertificatesView.as_view(), name='api_verify_certificates'),
+    path('api/verify-certificate-token/', VerifyCertificateTokenView.as_view(), name='api_verify_certificate_token'),
+    # Async exam flow for ASGI deployments; same payloads as the /api/results/ actions
+    path('api/async/results/start_exam/', async_views.start_exam, name='async_start_exam'),
+    path('api/async/results/submit_exam/', async_views.submit_exam, name='async_submit_exam'),
+    path('api/async/results/attempt_status/', async_views.attempt_status, name='async_attempt_status'),
     path('api/', include(router.urls)),
 ]
@@ -0,0 +1,242 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+from .models import Certificate, normalize_certificate_number
+
+# Public verification is scraped with guessed numbers, so both outcomes are
+# cached: hits in the default cache (cleared by the Certificate signals), and
+# misses in a bounded per-process LRU. Unless CACHES names a shared backend
+# the default cache is per process too, so the signals only clear the
+# process that saved the certificate. Cached hits are therefore only trusted
+# for what never changes after issue; revocation comes from RevocationSet. A
+# miss only lives MISS_TTL seconds, which bounds how long another process can
+# keep denying a number issued after it was first probed.
+HIT_TIMEOUT = 60 * 60
+MISS_TTL = 5 * 60
+MAX_MISSES = 10000
+# A revocation made by another process applies here within this many seconds
+REVOCATION_REFRESH = 30
+MAX_KEY_LENGTH = Certificate._meta.get_field('certificate_key').max_length
+# Keeps one bulk request a single IN query well inside every backend's parameter limit
+MAX_BULK_VERIFY = 5000
+
+# Only what the verification page shows, so cached entries carry no account details
+VERIFY_FIELDS = (
+    'id', 'certificate_number', 'certificate_key', 'issued_date', 'name', 'institution', 'score', 'revoked',
+    'user__username', 'user__first_name', 'user__last_name', 'exam__name', 'task__name',
+)
+
+
+class MissCache:
+    """Bounded LRU of certificate keys known not to exist, each expiring after a TTL."""
+
+    def __init__(self, max_size=MAX_MISSES, ttl=MISS_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key):
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+misses = MissCache()
+
+
+class RevocationSet:
+    """
+    Keys of revoked certificates, held in memory so verification runs no
+    query for them. Revocations saved in this process apply at once. Every
+    REVOCATION_REFRESH seconds one aggregate query reads a version stamp (the
+    count and latest revoked_at of revoked certificates), and the keys are
+    reloaded only when it has changed.
+    """
+
+    def __init__(self, refresh=REVOCATION_REFRESH):
+        self.refresh = refresh
+        self._keys = frozenset()
+        self._stamp = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at > self.refresh:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at > self.refresh:
+                    revoked = Certificate.objects.filter(revoked=True)
+                    stamp = revoked.aggregate(count=Count('pk'), latest=Max('revoked_at'))
+                    if stamp != self._stamp:
+                        self._keys = frozenset(revoked.values_list('certificate_key', flat=True))
+                        self._stamp = stamp
+                    self._checked_at = now
+        return self._keys
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def add(self, key):
+        with self._lock:
+            self._keys = self._keys | {key}
+
+    def discard(self, key):
+        with self._lock:
+            self._keys = self._keys - {key}
+
+    def clear(self):
+        with self._lock:
+            self._keys = frozenset()
+            self._stamp = None
+            self._checked_at = None
+
+
+revocations = RevocationSet()
+
+
+class VerifyRateThrottle(SimpleRateThrottle):
+    """Per-IP limit for public certificate lookups; the rate is REST_FRAMEWORK's 'certificate_verify'."""
+    scope = 'certificate_verify'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+def _hit_key(key):
+    # Keys come straight from the public; hash them into something every cache backend accepts
+    return f"certificate:verify:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+
+def lookup_certificate(number):
+    """
+    The certificate with this number, ignoring case and surrounding whitespace,
+    or None. On a cache hit its revoked flag comes from RevocationSet, so a
+    hit runs no query.
+    """
+    key = normalize_certificate_number(number)
+    if not key or len(key) > MAX_KEY_LENGTH or key in misses:
+        return None
+    certificate = cache.get(_hit_key(key))
+    if certificate is not None:
+        # A revocation saved by another process cannot have cleared this entry
+        certificate.revoked = key in revocations
+    else:
+        certificate = (
+            Certificate.objects.filter(certificate_key=key)
+            .select_related('user', 'exam', 'task')
+            .only(*VERIFY_FIELDS)
+            .first()
+        )
+        if certificate is None:
+            misses.add(key)
+            return None
+        cache.set(_hit_key(key), certificate, HIT_TIMEOUT)
+    return certificate
+
+
+def forget_certificate(number, revoked=False):
+    """Drop cached lookups of a number after its certificate is created, changed or deleted."""
+    key = normalize_certificate_number(number)
+    cache.delete(_hit_key(key))
+    misses.discard(key)
+    if revoked:
+        revocations.add(key)
+    else:
+        revocations.discard(key)
+
+
+def is_revoked(number):
+    """
+    Whether the certificate with this number has been revoked, from
+    RevocationSet: no query, and within REVOCATION_REFRESH seconds of a
+    revocation made in another process.
+    """
+    return normalize_certificate_number(number) in revocations
+
+
+def revoke_certificates(certificates):
+    """Revoke a queryset of certificates with one UPDATE; returns how many were newly revoked."""
+    numbers = list(certificates.filter(revoked=False).values_list('certificate_number', flat=True))
+    count = Certificate.objects.filter(certificate_number__in=numbers, revoked=False).update(
+        revoked=True, revoked_at=timezone.now()
+    )
+    # update() sends no signals
+    for number in numbers:
+        forget_certificate(number, revoked=True)
+    return count
+
+
+class BulkVerifyRateThrottle(VerifyRateThrottle):
+    scope = 'certificate_bulk_verify'
+
+
+BULK_VERIFY_FIELDS = (
+    'certificate_key', 'certificate_number', 'name', 'issued_date', 'score', 'flagged', 'revoked',
+    'user__username', 'user__first_name', 'user__last_name', 'exam__name', 'task__name',
+)
+
+
+def bulk_verify(numbers):
+    """
+    One verification result per submitted number, in order, resolved with a
+    single IN query on certificate_key. Rows are read with values(), since
+    building model instances would cost more than the lookup itself.
+    """
+    keys = []
+    for number in numbers:
+        key = normalize_certificate_number(number) if isinstance(number, str) else ''
+        keys.append(key if key and len(key) <= MAX_KEY_LENGTH else None)
+
+    wanted = {key for key in keys if key}
+    rows = {}
+    if wanted:
+        for row in Certificate.objects.filter(certificate_key__in=wanted).values(*BULK_VERIFY_FIELDS):
+            rows.setdefault(row['certificate_key'], row)
+
+    results = []
+    for number, key in zip(numbers, keys):
+        if key is None:
+            results.append({'certificate_number': number, 'status': 'invalid'})
+            continue
+        row = rows.get(key)
+        if row is None:
+            results.append({'certificate_number': number, 'status': 'not_found'})
+            continue
+        full_name = f"{row['user__first_name']} {row['user__last_name']}".strip()
+        results.append({
+            'certificate_number': row['certificate_number'],
+            'status': 'revoked' if row['revoked'] else 'valid',
+            'holder': row['name'] or full_name or row['user__username'],
+            'exam': row['exam__name'] or row['task__name'],
+            'score': row['score'],
+            'issued_date': row['issued_date'].isoformat(),
+            'flagged': row['flagged'],
+        })
+    return results
@@ -9,13 +9,33 @@ from django.contrib import messages
 from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.utils.text import slugify
-from datetime import timedelta, datetime
+from datetime import date, timedelta, datetime
 from django.views.decorators.csrf import csrf_protect
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from .models import Mentor, Task, Submission, Exam, Question, Result, Certificate, Topic, SampleQuestion, ExamAttempt, UserActivityLog, CustomUser, Resource, ForumPost, ForumComment
+from .question_pack import (
+    get_question_pack, get_answer_key, new_seed, question_order_for, question_set_for, attempt_answers, stored_answers
+)
+from .exam_payloads import attempt_payload, attempt_status_payload, submission_payload
+from .grading import normalize_answers, grade_answers
+from .autosave import autosave_answers, buffered_answers, discard_buffer, merge_answers
+from .admission import admit_start
+from .attempt_stats import attempts_used, record_finished_attempt, stats_by_exam
+from .provisioning import exam_roster, provision_attempts
+from .proctoring import accepts_events, record_events
+from .item_stats import item_analysis, record_item_stats
+from .attempt_state import create_attempt, finish_attempt
+from .certificates import DEFAULT_INSTITUTION, build_exam_certificate, issue_certificates, pending_results
+from .certificate_export import stream_certificates_zip
+from .jobs import enqueue
+from .verification import (
+    MAX_BULK_VERIFY, BulkVerifyRateThrottle, VerifyRateThrottle, bulk_verify, is_revoked, lookup_certificate,
+)
+from .certificate_signing import InvalidToken, verify_token
+from .certificate_pdf import PDF_MAX_AGE, cached_certificate_pdf, certificate_fields, content_hash
 
 @login_required
 def leaderboard_view(request):
@@ -90,6 +110,42 @@ class LoginView(generics.GenericAPIView):
             'message': 'Invalid credentials'
         }, status=status.HTTP_401_UNAUTHORIZED)
 
+class BulkVerifyCertificatesView(generics.GenericAPIView):
+    """Public JSON verification of many certificate numbers at once, for employers."""
+    permission_classes = [AllowAny]
+    # No session, so partner scripts need no CSRF token; the throttle is per client IP
+    authentication_classes = []
+    throttle_classes = [BulkVerifyRateThrottle]
+
+    def post(self, request):
+        numbers = request.data.get('certificate_numbers') if isinstance(request.data, dict) else None
+        if not isinstance(numbers, list) or not numbers:
+            return Response({'error': 'certificate_numbers must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(numbers) > MAX_BULK_VERIFY:
+            return Response(
+                {'error': f'At most {MAX_BULK_VERIFY} certificate numbers per request'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = bulk_verify(numbers)
+        return Response({
+            'count': len(results),
+            'valid': sum(1 for r in results if r['status'] == 'valid'),
+            'results': results,
+        })
+
+class VerifyCertificateTokenView(generics.GenericAPIView):
+    """Check a certificate's signed token by HMAC and the in-memory revocation set, without a query."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            claims = verify_token(request.query_params.get('token'))
+        except InvalidToken as exc:
+            return Response({'valid': False, 'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        revoked = is_revoked(claims['number'])
+        return Response({'valid': not revoked, 'revoked': revoked, **claims})
+
 class LogoutView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     
@@ -248,6 +304,53 @@ class ExamViewSet(viewsets.ModelViewSet):
 
         return Response(data)
 
+    @action(detail=True, methods=['get'])
+    def item_analysis(self, request, pk=None):
+        """Per-question difficulty and answer distribution from the running counters."""
+        exam = self.get_object()
+        if not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(item_analysis(exam))
+
+    @action(detail=True, methods=['get'])
+    def certificates_zip(self, request, pk=None):
+        """Every certificate PDF for the exam plus a manifest CSV, streamed as one ZIP."""
+        from django.http import StreamingHttpResponse
+
+        exam = self.get_object()
+        if not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+        response = StreamingHttpResponse(
+            stream_certificates_zip(Certificate.objects.filter(exam=exam), timezone.now()),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{slugify(exam.name) or "exam"}-certificates.zip"'
+        return response
+
+    @action(detail=True, methods=['post'])
+    def provision_attempts(self, request, pk=None):
+        """Pre-create ready-to-start attempts for a roster ahead of a proctored sitting."""
+        exam = self.get_object()
+        if not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+        user_ids = request.data.get('user_ids')
+        if user_ids is None:
+            user_ids = exam_roster(exam).values_list('id', flat=True)
+        elif not isinstance(user_ids, list):
+            return Response({'error': 'user_ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user_ids = [int(u) for u in user_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'user_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created, skipped = provision_attempts(exam, user_ids)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': created, 'skipped': sum(skipped.values()), 'skipped_reasons': dict(skipped)})
+
 class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
@@ -279,103 +382,136 @@ class ResultViewSet(viewsets.ModelViewSet):
 
         now = timezone.now()
 
-        # If there is an active attempt, either resume it or expire it
-        active = ExamAttempt.objects.filter(user=request.user, exam=exam, status='in_progress').order_by('-started_at').first()
+        # An in-progress attempt is resumed (or expired); a provisioned one is activated
+        open_attempts = list(ExamAttempt.objects.filter(
+            user=request.user, exam=exam, status__in=['in_progress', 'provisioned']
+        ).order_by('-started_at'))
+        active = next((a for a in open_attempts if a.status == 'in_progress'), None)
+        provisioned = next((a for a in open_attempts if a.status == 'provisioned'), None)
         if active:
-            if now > active.expires_at:
-                active.status = 'expired'
-                active.submitted_at = now
-                active.save(update_fields=['status', 'submitted_at'])
-            else:
-                question_ids = list(active.question_order or [])
-                questions_qs = Question.objects.filter(exam=exam, id__in=question_ids)
-                questions_by_id = {q.id: q for q in questions_qs}
-                questions_payload = []
-                for qid in question_ids:
-                    q = questions_by_id.get(qid)
-                    if not q:
-                        continue
-                    questions_payload.append({
-                        'id': q.id,
-                        'question_text': q.question_text,
-                        'question_type': q.question_type,
-                        'options': list(q.options or []),
-                    })
-
-                return Response({
-                    'attempt_id': active.id,
-                    'attempt_number': active.attempt_number,
-                    'expires_at': active.expires_at.isoformat(),
-                    'duration_seconds': int(max(0, (active.expires_at - now).total_seconds())),
-                    'max_attempts': int(exam.max_attempts or 0),
-                    'questions': questions_payload,
-                })
+            if now <= active.expires_at:
+                return self._resume_response(active, exam, now)
+            # Only count the expiry if no concurrent submit or sweep finished it first
+            if finish_attempt(active, 'expired', now):
+                record_finished_attempt(active)
 
-        completed_attempts = ExamAttempt.objects.filter(
-            user=request.user,
-            exam=exam,
-            status__in=['completed', 'expired']
-        ).count()
+        expires_at = now + timedelta(minutes=int(exam.duration_minutes or 0))
+        ip_address = request.META.get('REMOTE_ADDR')
+        user_agent = (request.META.get('HTTP_USER_AGENT') or '')[:1000]
+
+        if provisioned:
+            # Numbering, seed and the row itself were prepared ahead of the sitting;
+            # the question set is only fixed now, when the student first sees it
+            question_set = question_set_for(get_question_pack(exam.id, exam.pack_version))
+            claimed = ExamAttempt.objects.filter(pk=provisioned.pk, status='provisioned').update(
+                status='in_progress',
+                started_at=now,
+                expires_at=expires_at,
+                question_set=question_set,
+                ip_address=ip_address,
+                user_agent=user_agent,
+            )
+            if not claimed:
+                # A concurrent request activated it first; resume that attempt
+                return self._resume_response(ExamAttempt.objects.get(pk=provisioned.pk), exam, now)
+            provisioned.expires_at = expires_at
+            provisioned.question_set = question_set
+            return self._attempt_response(provisioned, exam, now)
+
+        # Shed load during scheduled sittings before doing any real work
+        admission = admit_start(exam, now)
+        if not admission.admitted:
+            response = Response({
+                'error': 'Many students are starting this exam right now. Please wait.',
+                'queue_position': admission.queue_position,
+                'retry_after': admission.retry_after,
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(admission.retry_after)
+            return response
+
+        completed_attempts = attempts_used(request.user.id, exam.id)
 
         max_attempts = int(exam.max_attempts or 0)
         if max_attempts > 0 and completed_attempts >= max_attempts:
             return Response({'error': 'Retake limit reached for this exam.'}, status=status.HTTP_403_FORBIDDEN)
 
-        attempt_number = completed_attempts + 1
-        expires_at = now + timedelta(minutes=int(exam.duration_minutes or 0))
-
-        # Randomize questions (and options) per attempt
-        questions_qs = Question.objects.filter(exam=exam)
-        question_ids = list(questions_qs.values_list('id', flat=True))
-        if not question_ids:
+        pack = get_question_pack(exam.id, exam.pack_version)
+        if not pack:
             return Response({'error': 'No questions found for this exam'}, status=status.HTTP_400_BAD_REQUEST)
 
-        import random
-        random.shuffle(question_ids)
-
-        questions_by_id = {q.id: q for q in questions_qs}
-        questions_payload = []
-        for qid in question_ids:
-            q = questions_by_id.get(qid)
-            if not q:
-                continue
-
-            opts = list(q.options or [])
-            # Fix for True/False questions: ensure options exist
-            if q.question_type == 'true_false' and not opts:
-                opts = ['True', 'False']
-            
-            if opts:
-                random.shuffle(opts)
-
-            questions_payload.append({
-                'id': q.id,
-                'question_text': q.question_text,
-                'question_type': q.question_type,
-                'options': opts,
-            })
-
-        ip_address = request.META.get('REMOTE_ADDR')
-        user_agent = (request.META.get('HTTP_USER_AGENT') or '')[:1000]
-
-        attempt = ExamAttempt.objects.create(
-            user=request.user,
-            exam=exam,
-            attempt_number=attempt_number,
+        # Randomize questions (and options) per attempt; only the seed and the ids shown are stored
+        attempt, created = create_attempt(
+            request.user,
+            exam,
+            completed_attempts + 1,
             expires_at=expires_at,
-            question_order=question_ids,
+            seed=new_seed(),
+            question_set=question_set_for(pack),
             ip_address=ip_address,
             user_agent=user_agent,
         )
+        if not created:
+            return self._resume_response(attempt, exam, now)
+        return self._attempt_response(attempt, exam, now)
+
+    def _attempt_response(self, attempt, exam, now, answers=None):
+        return Response(attempt_payload(attempt, exam, get_question_pack(exam.id, exam.pack_version), now, answers=answers))
+
+    def _resume_response(self, attempt, exam, now):
+        saved = buffered_answers(attempt.id)
+        return self._attempt_response(attempt, exam, now, answers=saved if saved is not None else attempt_answers(attempt))
+
+    @action(detail=False, methods=['patch'])
+    def autosave(self, request):
+        """
+        Buffer a small answer delta for an in-progress attempt. With flush,
+        the buffer is written through; clients send that once their changes
+        stop, so a save that was only buffered is not left there.
+        """
+        if request.user.is_staff:
+            return Response({'error': 'Staff users cannot take exams.'}, status=status.HTTP_403_FORBIDDEN)
 
-        return Response({
-            'attempt_id': attempt.id,
-            'attempt_number': attempt.attempt_number,
-            'expires_at': expires_at.isoformat(),
-            'duration_seconds': int((expires_at - now).total_seconds()),
-            'max_attempts': max_attempts,
-            'questions': questions_payload,
-        })
+        attempt_id = request.data.get('attempt_id')
+        delta = request.data.get('answers')
+        if not attempt_id:
+            return Response({'error': 'attempt_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(delta, dict):
+            return Response({'error': 'answers must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # answers is only read when nothing is buffered yet
+            attempt = ExamAttempt.objects.only('id', 'status', 'expires_at').get(id=attempt_id, user=request.user)
+        except ExamAttempt.DoesNotExist:
+            return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if attempt.status != 'in_progress' or timezone.now() > attempt.expires_at:
+            return Response({'error': 'This attempt is no longer in progress.'}, status=status.HTTP_409_CONFLICT)
+
+        answers, flushed = autosave_answers(attempt, delta, flush=request.data.get('flush') is True)
+        return Response({'saved': len(answers), 'flushed': flushed})
+
+    @action(detail=False, methods=['post'])
+    def proctoring_events(self, request):
+        """Append a batch of buffered proctoring events to an attempt's log."""
+        attempt_id = request.data.get('attempt_id')
+        events = request.data.get('events')
+        if not attempt_id:
+            return Response({'error': 'attempt_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(events, list):
+            return Response({'error': 'events must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            attempt = ExamAttempt.objects.only('id', 'status', 'started_at', 'expires_at', 'submitted_at').get(
+                id=attempt_id, user=request.user
+            )
+        except ExamAttempt.DoesNotExist:
+            return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        now = timezone.now()
+        if not accepts_events(attempt, now):
+            return Response({'error': 'This attempt no longer accepts events.'}, status=status.HTTP_409_CONFLICT)
+
+        return Response({'recorded': record_events(attempt, events, now)})
 
     @action(detail=False, methods=['post'])
     def submit_exam(self, request):
@@ -399,47 +535,34 @@ class ResultViewSet(viewsets.ModelViewSet):
         now = timezone.now()
         is_expired = now > attempt.expires_at
 
-        # Normalize answers: accept either {"q123": "A"} or {"123": "A"}
-        normalized = {}
-        if isinstance(answers, dict):
-            for k, v in answers.items():
-                key = str(k).strip()
-                if key.startswith('q'):
-                    key = key[1:]
-                if key.isdigit():
-                    normalized[int(key)] = str(v).strip()
-
-        question_ids = list(attempt.question_order or [])
-        questions = list(Question.objects.filter(exam=exam, id__in=question_ids))
-        questions_by_id = {q.id: q for q in questions}
-
-        total_questions = len(question_ids) if question_ids else len(questions)
-        if total_questions <= 0:
-            return Response({'error': 'No questions found for this exam'}, status=status.HTTP_400_BAD_REQUEST)
-
-        points_per_question = 100 / total_questions
-        score = 0.0
+        # Merge autosaved answers first; whatever the client submits now takes precedence
+        saved = buffered_answers(attempt.id)
+        if saved is None:
+            saved = attempt_answers(attempt)
+        normalized = normalize_answers(merge_answers(saved, answers))
 
-        # Score in the presented question order for consistency
-        for qid in question_ids:
-            q = questions_by_id.get(qid)
-            if not q:
-                continue
-            user_answer = normalized.get(q.id)
-            if user_answer is None:
-                continue
-            if str(user_answer).strip() == str(q.correct_answer).strip():
-                score += points_per_question
+        answer_key = get_answer_key(exam.id, exam.pack_version)
+        question_ids = question_order_for(attempt, answer_key.keys())
+        if not question_ids:
+            return Response({'error': 'No questions found for this exam'}, status=status.HTTP_400_BAD_REQUEST)
 
-        score = round(score, 2)
+        # Score in the presented question order against the cached answer key
+        score = grade_answers(answer_key, question_ids, normalized)
         passed = score >= float(exam.pass_score)
 
-        attempt.answers = {str(k): v for k, v in normalized.items()}
-        attempt.score = score
-        attempt.passed = passed
-        attempt.submitted_at = now
-        attempt.status = 'expired' if is_expired else 'completed'
-        attempt.save(update_fields=['answers', 'score', 'passed', 'submitted_at', 'status'])
+        # Exactly one of several concurrent submits (or a sweep) gets to finish the attempt
+        if not finish_attempt(
+            attempt,
+            'expired' if is_expired else 'completed',
+            now,
+            answers=stored_answers(normalized, question_ids, get_question_pack(exam.id, exam.pack_version)),
+            score=score,
+            passed=passed,
+        ):
+            return Response({'error': 'This attempt is already submitted.'}, status=status.HTTP_400_BAD_REQUEST)
+        discard_buffer(attempt.id)
+        record_finished_attempt(attempt)
+        record_item_stats(answer_key, question_ids, normalized)
 
         # Keep Result as the latest-attempt summary for compatibility with existing pages
         result, created = Result.objects.get_or_create(
@@ -453,152 +576,56 @@ class ResultViewSet(viewsets.ModelViewSet):
             result.taken_at = now
             result.save(update_fields=['score', 'passed', 'taken_at'])
 
-        # Auto-generate Certificate if passed
+        # Issued by the job worker; it skips users who already hold this exam's certificate
         if passed:
-            # Check if certificate already exists to avoid duplicates
-            if not Certificate.objects.filter(user=request.user, exam=exam).exists():
-                import uuid
-                cert_number = f"CERT-{uuid.uuid4().hex[:10].upper()}"
-                Certificate.objects.create(
-                    user=request.user,
-                    exam=exam,
-                    certificate_number=cert_number,
-                    name=request.user.get_full_name() or request.user.username,
-                    institution='TaskCert Platform',
-                    score=score
-                )
+            enqueue('issue_exam_certificate', user_id=request.user.id, exam_id=exam.id, score=score)
 
-        return Response({
-            'score': score,
-            'passed': passed,
-            'status': attempt.status,
-            'attempt_number': attempt.attempt_number,
-            'message': 'Exam submitted successfully'
-        })
+        return Response(submission_payload(attempt))
+
+    @action(detail=False, methods=['get'])
+    def attempt_status(self, request):
+        """Status, remaining time and score of one of the user's attempts."""
+        attempt_id = request.query_params.get('attempt_id')
+        if not attempt_id:
+            return Response({'error': 'attempt_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        attempt = ExamAttempt.objects.filter(id=attempt_id, user=request.user).only(
+            'id', 'attempt_number', 'status', 'expires_at', 'submitted_at', 'score', 'passed'
+        ).first()
+        if attempt is None:
+            return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(attempt_status_payload(attempt, timezone.now()))
 
 class CertificateViewSet(viewsets.ModelViewSet):
-    queryset = Certificate.objects.all()
+    queryset = Certificate.objects.select_related('user', 'exam', 'task')
     serializer_class = CertificateSerializer
     permission_classes = [IsAuthenticated]
     
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """Download certificate as PDF"""
-        from django.http import HttpResponse
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage
-        from reportlab.lib.enums import TA_CENTER
-        from io import BytesIO
-        import os
-        
+        from django.http import FileResponse, HttpResponseNotModified
+        from django.utils.http import parse_etags, quote_etag
+
         certificate = self.get_object()
         if certificate.user != request.user and not request.user.is_staff:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        
-        # Create PDF in memory
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Add spacing
-        story.append(Spacer(1, 1.5*inch))
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=48,
-            textColor='#8B4513',
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        story.append(Paragraph("Certificate of Completion", title_style))
-        story.append(Spacer(1, 0.5*inch))
-        
-        # Body text
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['Normal'],
-            fontSize=14,
-            alignment=TA_CENTER,
-            spaceAfter=12
-        )
-        story.append(Paragraph("This is to certify that", body_style))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Name
-        name_style = ParagraphStyle(
-            'CustomName',
-            parent=styles['Heading2'],
-            fontSize=24,
-            textColor='#8B4513',
-            alignment=TA_CENTER,
-            spaceAfter=12,
-            fontName='Helvetica-Bold'
-        )
-        name = certificate.name or certificate.user.get_full_name() or certificate.user.username
-        story.append(Paragraph(name, name_style))
-        story.append(Spacer(1, 0.3*inch))
-        
-        # Body text
-        story.append(Paragraph("has successfully completed the examination", body_style))
-        story.append(Spacer(1, 0.1*inch))
-        
-        # Exam/Task name
-        exam_style = ParagraphStyle(
-            'CustomExam',
-            parent=styles['Heading3'],
-            fontSize=16,
-            alignment=TA_CENTER,
-            spaceAfter=12
-        )
-        
-        cert_name = "Unknown Certification"
-        if certificate.exam:
-            cert_name = certificate.exam.name
-        elif certificate.task:
-            cert_name = certificate.task.name
-            
-        story.append(Paragraph(f"<b>{cert_name}</b>", exam_style))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Institution
-        if certificate.institution:
-            story.append(Paragraph(f"from <b>{certificate.institution}</b>", body_style))
-            story.append(Spacer(1, 0.1*inch))
-        
-        # Score
-        if certificate.score is not None:
-            score_formatted = int(round(certificate.score))
-            story.append(Paragraph(f"with a score of <b>{score_formatted}%</b>", body_style))
-            story.append(Spacer(1, 0.2*inch))
-        
-        story.append(Paragraph("In recognition of the achievement and competency demonstrated", body_style))
-        story.append(Spacer(1, 0.5*inch))
-        
-        # Certificate details
-        details_style = ParagraphStyle(
-            'CustomDetails',
-            parent=styles['Normal'],
-            fontSize=10,
-            alignment=TA_CENTER,
-            spaceAfter=6,
-            textColor='#666666'
-        )
-        story.append(Paragraph(f"Certificate No.: {certificate.certificate_number}", details_style))
-        story.append(Paragraph(f"Issued: {certificate.issued_date.strftime('%B %d, %Y')}", details_style))
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        
-        # Return as attachment
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Certificate_{certificate.certificate_number}.pdf"'
+
+        # The ETag is the content hash, so a matching client copy is answered without touching the file
+        fields = certificate_fields(certificate)
+        etag = quote_etag(content_hash(fields))
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            pdf, _ = cached_certificate_pdf(certificate, fields)
+            response = FileResponse(
+                pdf,
+                as_attachment=True,
+                filename=f"Certificate_{certificate.certificate_number}.pdf",
+                content_type='application/pdf',
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = f'private, max-age={PDF_MAX_AGE}'
         return response
 
 
@@ -852,10 +879,10 @@ def exams_view(request):
     attempt_counts = {}
     recent_attempts = []
     if exams.exists():
-        from django.db.models import Count
-        attempts_qs = ExamAttempt.objects.filter(user=request.user, exam__in=exams).select_related('exam').order_by('-started_at')
-        for row in attempts_qs.values('exam_id').annotate(cnt=Count('id')):
-            attempt_counts[row['exam_id']] = row['cnt']
+        attempts_qs = ExamAttempt.objects.filter(user=request.user, exam__in=exams).exclude(
+            status='provisioned'
+        ).select_related('exam').order_by('-started_at')
+        attempt_counts = {exam_id: s.attempts_used for exam_id, s in stats_by_exam(request.user.id).items()}
         recent_attempts = list(attempts_qs[:10])
 
     context = {
@@ -889,6 +916,7 @@ def exam_result_view(request, attempt_id):
     correct_answers = Result.objects.filter(user=request.user, exam=attempt.exam).first()
     score = correct_answers.score if correct_answers else 0
     passed = score >= attempt.exam.pass_score
+    answered_count = len(attempt_answers(attempt))
     
     context = {
         'attempt': attempt,
@@ -896,6 +924,7 @@ def exam_result_view(request, attempt_id):
         'score': score,
         'passed': passed,
         'total_questions': total_questions,
+        'answered_count': answered_count,
         'status': 'Completed' if attempt.submitted_at else 'Incomplete'
     }
     return render(request, 'exams/result.html', context)
@@ -923,20 +952,51 @@ def certificates_view(request):
 @csrf_protect
 def verify_certificate_view(request):
     query = (request.POST.get('certificate_number') or request.GET.get('q') or '').strip()
+    token = (request.GET.get('token') or '').strip()
     certificate = None
     error = None
+    signed = False
+
+    status_code = 200
 
-    if query:
-        certificate = Certificate.objects.filter(certificate_number__iexact=query).select_related('user', 'exam').first()
-        if not certificate:
-            error = 'Certificate not found. Please check the certificate number.'
+    if token:
+        # The link printed on a certificate: checked by signature and the revocation set, no query
+        try:
+            claims = verify_token(token)
+        except InvalidToken as exc:
+            error = str(exc)
+        else:
+            query = claims['number']
+            if is_revoked(claims['number']):
+                error = 'This certificate has been revoked.'
+            else:
+                signed = True
+                certificate = {
+                    'certificate_number': claims['number'],
+                    'name': claims['holder'],
+                    'exam': {'name': claims['exam']},
+                    'score': claims['score'],
+                    'issued_date': date.fromisoformat(claims['issued_date']),
+                }
+    elif query:
+        if not VerifyRateThrottle().allow_request(request, None):
+            error = 'Too many verification attempts. Please try again in a minute.'
+            status_code = 429
+        else:
+            certificate = lookup_certificate(query)
+            if not certificate:
+                error = 'Certificate not found. Please check the certificate number.'
+            elif certificate.revoked:
+                certificate = None
+                error = 'This certificate has been revoked.'
 
     context = {
         'query': query,
         'certificate': certificate,
         'error': error,
+        'signed': signed,
     }
-    return render(request, 'certificates/verify_certificate.html', context)
+    return render(request, 'certificates/verify_certificate.html', context, status=status_code)
 
 @login_required(login_url='/login/')
 def my_tasks_view(request):
@@ -1205,28 +1265,13 @@ def review_submission_view(request, submission_id):
             submission.task.status = 'completed'
             submission.task.save()
             
-            # Generate Certificate for the Task
-            if not Certificate.objects.filter(user=submission.submitted_by, task=submission.task).exists():
-                import uuid
-                cert_number = f"TASK-{uuid.uuid4().hex[:10].upper()}"
-                Certificate.objects.create(
-                    user=submission.submitted_by,
-                    task=submission.task,
-                    certificate_number=cert_number,
-                    name=submission.submitted_by.get_full_name() or submission.submitted_by.username,
-                    institution='TaskCert Platform',
-                    score=submission.score
-                )
-                
-                # Log Activity
-                try:
-                    UserActivityLog.objects.create(
-                        user=submission.submitted_by,
-                        activity_type='certificate_issued',
-                        details=f'Certificate issued for Task: {submission.task.name}'
-                    )
-                except Exception:
-                    pass
+            # Generate Certificate for the Task, and log it, in the job worker
+            enqueue(
+                'issue_task_certificate',
+                user_id=submission.submitted_by_id,
+                task_id=submission.task_id,
+                score=submission.score
+            )
 
             # Auto-assign next task if available
             user_tasks = Task.objects.filter(
@@ -1403,115 +1448,84 @@ def logout_view(request):
     auth_logout(request)
     return redirect('/login/')
 
+# Public sort names for the pending list; pk keeps pages stable between equal values
+PENDING_SORTS = {
+    'newest': ('-taken_at', '-pk'),
+    'oldest': ('taken_at', 'pk'),
+    'score': ('-score', '-pk'),
+    'student': ('user__username', 'pk'),
+    'exam': ('exam__name', 'pk'),
+}
+CERTIFICATES_PER_PAGE = 25
+
+
 @login_required(login_url='/login/')
 @csrf_protect
 def manage_certificates_view(request):
     if not request.user.is_staff:
         return redirect('/dashboard/')
-    
+
+    success = None
+    error = None
     if request.method == 'POST':
         action = request.POST.get('action')
-        
-        if action == 'create':
-            result_id = request.POST.get('result_id')
-            institution_name = request.POST.get('institution_name', '')
-            
-            try:
-                result = Result.objects.get(id=result_id)
-                if not result.passed:
-                    # Get all passed results without certificates
-                    passed_results = Result.objects.filter(passed=True).select_related('user', 'exam')
-                    pending = []
-                    for r in passed_results:
-                        if not Certificate.objects.filter(user=r.user, exam=r.exam).exists():
-                            pending.append(r)
-                    
-                    return render(request, 'admin/manage_certificates.html', {
-                        'error': 'Can only create certificates for passed exams',
-                        'certificates': Certificate.objects.all().order_by('-issued_date'),
-                        'pending_results': pending,
-                    })
-                
-                # Check if certificate already exists
-                if Certificate.objects.filter(user=result.user, exam=result.exam).exists():
-                    # Get all passed results without certificates
-                    passed_results = Result.objects.filter(passed=True).select_related('user', 'exam')
-                    pending = []
-                    for r in passed_results:
-                        if not Certificate.objects.filter(user=r.user, exam=r.exam).exists():
-                            pending.append(r)
-                    
-                    return render(request, 'admin/manage_certificates.html', {
-                        'error': 'Certificate already exists for this exam',
-                        'certificates': Certificate.objects.all().order_by('-issued_date'),
-                        'pending_results': pending,
-                    })
-                
-                import uuid
-                cert_number = f"CERT-{uuid.uuid4().hex[:10].upper()}"
-                
-                certificate = Certificate.objects.create(
-                    user=result.user,
-                    exam=result.exam,
-                    certificate_number=cert_number,
-                    name=result.user.get_full_name() or result.user.username,
-                    institution=institution_name,
-                    score=result.score
-                )
-                
-                # Get all passed results without certificates
-                passed_results = Result.objects.filter(passed=True).select_related('user', 'exam')
-                pending = []
-                for r in passed_results:
-                    if not Certificate.objects.filter(user=r.user, exam=r.exam).exists():
-                        pending.append(r)
-                
-                return render(request, 'admin/manage_certificates.html', {
-                    'success': f'Certificate {cert_number} created successfully for {result.user.username}',
-                    'certificates': Certificate.objects.all().order_by('-issued_date'),
-                    'pending_results': pending,
-                })
-            except Result.DoesNotExist:
-                # Get all passed results without certificates
-                passed_results = Result.objects.filter(passed=True).select_related('user', 'exam')
-                pending = []
-                for r in passed_results:
-                    if not Certificate.objects.filter(user=r.user, exam=r.exam).exists():
-                        pending.append(r)
-                
-                return render(request, 'admin/manage_certificates.html', {
-                    'error': 'Result not found',
-                    'certificates': Certificate.objects.all().order_by('-issued_date'),
-                    'pending_results': pending,
-                })
-    
-    # Get certificates and pending results
-    certificates = Certificate.objects.all().order_by('-issued_date')
 
-    # Get all passed results without certificates
-    passed_results = Result.objects.filter(passed=True).select_related('user', 'exam')
-    pending_results = []
-    for result in passed_results:
-        if not Certificate.objects.filter(user=result.user, exam=result.exam).exists():
-            pending_results.append(result)
+        if action == 'issue_all':
+            # PDFs are left to render on first download; the issue_certificates command pre-renders them
+            institution_name = request.POST.get('institution_name', '').strip() or DEFAULT_INSTITUTION
+            issued = issue_certificates(institution=institution_name)
+            success = f'{len(issued)} certificates issued'
 
-    # Calculate statistics
-    total_certificates = certificates.count()
-    pending_certificates = len(pending_results)
-    # Certificates issued today
-    today = timezone.now().date()
-    issued_today = certificates.filter(issued_date__date=today).count()
-    # Calculate average score
-    scores = certificates.values_list('score', flat=True)
-    avg_score = sum(scores) / len(scores) if scores else 0
+        elif action == 'create':
+            result_id = request.POST.get('result_id')
+            institution_name = request.POST.get('institution_name', '')
+            result = None
+            if str(result_id or '').isdigit():
+                result = Result.objects.select_related('user', 'exam').filter(id=result_id).first()
+
+            if result is None:
+                error = 'Result not found'
+            elif not result.passed:
+                error = 'Can only create certificates for passed exams'
+            elif Certificate.objects.filter(user=result.user, exam=result.exam).exists():
+                error = 'Certificate already exists for this exam'
+            else:
+                certificate = build_exam_certificate(result.user, result.exam, result.score, institution_name)
+                certificate.save()
+                success = f'Certificate {certificate.certificate_number} created successfully for {result.user.username}'
+
+    from django.core.paginator import Paginator
+    from django.db.models import Avg, Count, Q
+
+    sort = request.GET.get('sort')
+    if sort not in PENDING_SORTS:
+        sort = 'newest'
+    pending = pending_results().select_related('user', 'exam').order_by(*PENDING_SORTS[sort])
+    pending_page = Paginator(pending, CERTIFICATES_PER_PAGE).get_page(request.GET.get('page'))
+
+    # Totals, today's count and the average in one pass over the table
+    stats = Certificate.objects.aggregate(
+        total=Count('id'),
+        issued_today=Count('id', filter=Q(issued_date__date=timezone.now().date())),
+        avg_score=Avg('score'),
+    )
+
+    certificates = Certificate.objects.select_related('user', 'exam').order_by('-issued_date', '-pk')
+    certificates_paginator = Paginator(certificates, CERTIFICATES_PER_PAGE)
+    # Already counted above; spares the paginator its own COUNT(*)
+    certificates_paginator.count = stats['total']
+    certificates_page = certificates_paginator.get_page(request.GET.get('issued_page'))
 
     context = {
-        'certificates': certificates,
-        'pending_results': pending_results,
-        'total_certificates': total_certificates,
-        'pending_certificates': pending_certificates,
-        'issued_today': issued_today,
-        'avg_score': avg_score,
+        'certificates': certificates_page,
+        'pending_results': pending_page,
+        'pending_sort': sort,
+        'total_certificates': stats['total'],
+        'pending_certificates': pending_page.paginator.count,
+        'issued_today': stats['issued_today'],
+        'avg_score': stats['avg_score'] or 0,
+        'success': success,
+        'error': error,
     }
     return render(request, 'admin/manage_certificates.html', context)
 
@@ -1636,6 +1650,17 @@ def add_questions_view(request, exam_id):
         'questions': exam.questions.all().order_by('id')
     })
 
+@login_required(login_url='/login/')
+def item_analysis_view(request, exam_id):
+    if not request.user.is_staff:
+        return redirect('/dashboard/')
+
+    exam = get_object_or_404(Exam, id=exam_id)
+    return render(request, 'admin/item_analysis.html', {
+        'exam': exam,
+        'items': item_analysis(exam),
+    })
+
 @login_required(login_url='/login/')
 def delete_question_view(request, question_id):
     if not request.user.is_staff:
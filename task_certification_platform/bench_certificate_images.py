@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Benchmark certificate rendering with and without the image and font cache.
+
+Renders a batch of certificates that share an organization logo, a
+signature and a heading font, first clearing certificates.image_cache before
+every render (each certificate decodes its files again, as before the cache)
+and then with the cache warm. Rendering only: no database, nothing saved.
+
+Usage: python bench_certificate_images.py [--certificates 1000] [--font path/to/font.ttf]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_certification_platform.settings')
+django.setup()
+
+from django.test import override_settings
+from django.utils import timezone
+
+from certificates import image_cache
+from certificates.models import Certificate
+from users.models import User
+
+
+def default_font():
+    import reportlab
+    return os.path.join(os.path.dirname(reportlab.__file__), 'fonts', 'Vera.ttf')
+
+
+def write_images(media_root):
+    """A logo and a signature the size organizations typically upload."""
+    from PIL import Image, ImageDraw
+
+    paths = {}
+    for name, size in (('certificates/logos/logo.png', (1200, 600)), ('certificates/signatures/signature.png', (900, 300))):
+        path = os.path.join(media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image = Image.new('RGBA', size, (255, 255, 255, 0))
+        draw = ImageDraw.Draw(image)
+        for i in range(0, size[0], 8):
+            draw.line([(i, 0), (size[0] - i, size[1])], fill=(139, 69, 19, 255 - i % 200), width=3)
+        image.save(path)
+        paths[name] = path
+    return list(paths)
+
+
+def sample_certificate(i, logo, signature):
+    return Certificate(
+        user=User(username=f'student{i}', first_name='Student', last_name=f'Number {i}'),
+        certificate_number=f'CERT-20260314-{i:08X}',
+        verification_code=uuid.uuid4(),
+        issue_date=timezone.now(),
+        title='Certificate of Completion',
+        description='For completing the Python Fundamentals track and its final assessment.',
+        organization_name='TaskCert Platform',
+        organization_logo=logo,
+        signature=signature,
+        signatory_name='Program Director',
+        signatory_title='TaskCert Platform',
+    )
+
+
+def measure(certificates, cached):
+    timings = []
+    for certificate in certificates:
+        if not cached:
+            image_cache.images.clear()
+            image_cache.fonts.clear()
+        started = time.perf_counter()
+        certificate.render_pdf()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--certificates', type=int, default=1000)
+    parser.add_argument('--font', default=default_font(), help='TrueType font for headings')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as media_root, \
+            override_settings(MEDIA_ROOT=media_root, CERTIFICATE_FONT=args.font):
+        logo, signature = write_images(media_root)
+        certificates = [sample_certificate(i, logo, signature) for i in range(args.certificates)]
+
+        # Warm imports and reportlab's own module state so neither run pays for them
+        certificates[0].render_pdf()
+
+        results = {
+            'uncached': measure(certificates, cached=False),
+            'cached': measure(certificates, cached=True),
+        }
+
+    print(f"{args.certificates} certificates each")
+    print(f"{'renderer':<10}{'total s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, timings in results.items():
+        ordered = sorted(timings)
+        print(f"{name:<10}{sum(timings) / 1000:>10.2f}{statistics.mean(timings):>10.2f}"
+              f"{ordered[len(ordered) // 2]:>10.2f}{ordered[int(len(ordered) * 0.95) - 1]:>10.2f}")
+    speedup = statistics.mean(results['uncached']) / statistics.mean(results['cached'])
+    print(f"cached renders are {speedup:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
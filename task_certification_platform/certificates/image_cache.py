@@ -0,0 +1,98 @@
+"""
+Process-wide cache of the files certificate rendering loads from disk.
+
+Every certificate of an organization carries the same logo and signature, so
+decoding them once per process instead of once per PDF removes most of the
+per-certificate file I/O and PNG/JPEG decoding. Entries are keyed by
+(path, mtime), so replacing an uploaded file takes effect on the next render
+without any invalidation, and both caches are bounded LRUs. reportlab still
+compresses each image into every PDF that shows it; that is per document and
+stays in the render time.
+"""
+import copy
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+MAX_IMAGES = 32
+MAX_FONTS = 8
+
+
+class FileCache:
+    """Bounded LRU of values loaded from files, keyed by (path, mtime)."""
+
+    def __init__(self, load, max_size):
+        self.load = load
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        key = (path, os.stat(path).st_mtime_ns)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        # Loaded outside the lock; two threads missing together both load, and one copy wins
+        value = self.load(path)
+        with self._lock:
+            # An older version of the same file is now unreachable
+            for stale in [k for k in self._entries if k[0] == path and k != key]:
+                del self._entries[stale]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _load_image(path):
+    from reportlab.lib.utils import ImageReader
+
+    reader = ImageReader(path)
+    # Decode now, so the reader is only ever read once it is shared
+    reader.getSize()
+    reader.getRGBData()
+    return reader
+
+
+def _load_font(path):
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    # The name changes with the file, so a replaced font never reuses the old registration
+    name = f"{os.path.splitext(os.path.basename(path))[0]}-{os.stat(path).st_mtime_ns:x}"
+    pdfmetrics.registerFont(TTFont(name, path))
+    # One face for every weight, so <b> in a paragraph still maps to a font
+    pdfmetrics.registerFontFamily(name, normal=name, bold=name, italic=name, boldItalic=name)
+    return name
+
+
+images = FileCache(_load_image, MAX_IMAGES)
+fonts = FileCache(_load_font, MAX_FONTS)
+
+
+def image_reader(path):
+    """A decoded ImageReader for an image file, shared across renders."""
+    reader = images.get(path)
+    if 'jpeg_fh' in vars(reader):
+        # JPEGs are embedded straight from the reader's buffer by seeking it,
+        # so each render gets its own buffer over the same bytes
+        reader = copy.copy(reader)
+        reader.fp = BytesIO(reader.fp.getvalue())
+        reader.jpeg_fh = reader._jpeg_fh
+    return reader
+
+
+def registered_font(path):
+    """Register a TrueType font file once per process and return its font name."""
+    return fonts.get(path)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from certificates.models import Certificate
+
+
+class Command(BaseCommand):
+    help = "Render the PDF of every certificate that does not have one yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Render at most this many certificates')
+
+    def handle(self, *args, **options):
+        pending = (Certificate.objects.filter(pdf_file__in=['', None])
+                   .select_related('user').order_by('pk'))
+        if options['limit']:
+            pending = pending[:options['limit']]
+        rendered = 0
+        for certificate in pending.iterator():
+            certificate.generate_pdf_certificate()
+            rendered += 1
+        self.stdout.write(f"Rendered {rendered} certificates.")
@@ -87,10 +87,9 @@ class Certificate(models.Model):
             self.verification_url = self.get_verification_url()
             
         super().save(*args, **kwargs)
-        
-        # Generate PDF certificate if it doesn't exist
-        if not self.pdf_file:
-            self.generate_pdf_certificate()
+        # The PDF is not rendered here, so issuing a certificate stays cheap;
+        # `manage.py render_certificates` renders the missing ones later, and
+        # send_certificate_email() renders on demand
 
     def generate_certificate_number(self):
         """Generate a unique certificate number."""
@@ -113,16 +112,16 @@ class Certificate(models.Model):
             return False
         return True
 
-    def generate_pdf_certificate(self):
-        """Generate a PDF certificate for this record."""
+    def render_pdf(self):
+        """Render this certificate and return the PDF in a buffer, without saving it."""
         from io import BytesIO
         from reportlab.pdfgen import canvas
         from reportlab.lib.pagesizes import letter, landscape
         from reportlab.lib import colors
         from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.platypus import Paragraph, Table, TableStyle, Image, Spacer
+        from reportlab.platypus import Paragraph
         from reportlab.lib.units import inch
-        from django.core.files import File
+        from .image_cache import image_reader, registered_font
         
         # Create a file-like buffer to receive PDF data
         buffer = BytesIO()
@@ -133,10 +132,14 @@ class Certificate(models.Model):
         
         # Set up styles
         styles = getSampleStyleSheet()
+        heading_font = {}
+        if getattr(settings, 'CERTIFICATE_FONT', None):
+            heading_font['fontName'] = registered_font(settings.CERTIFICATE_FONT)
         title_style = ParagraphStyle(
             'Title',
             parent=styles['Heading1'],
             fontSize=24,
+            **heading_font,
             spaceAfter=20,
             alignment=1  # Center alignment
         )
@@ -145,6 +148,7 @@ class Certificate(models.Model):
             'Recipient',
             parent=styles['Heading2'],
             fontSize=20,
+            **heading_font,
             spaceAfter=30,
             alignment=1
         )
@@ -169,11 +173,11 @@ class Certificate(models.Model):
         p.setStrokeColor(colors.HexColor('#CCCCCC'))
         p.rect(0.5*inch, 0.5*inch, width-1*inch, height-1*inch, stroke=1, fill=0)
         
-        # Add organization logo if available
+        # Add organization logo if available; images are decoded once per process
         if self.organization_logo and os.path.exists(self.organization_logo.path):
             try:
-                logo = Image(self.organization_logo.path, width=2*inch, height=1*inch)
-                logo.drawOn(p, (width - logo.drawWidth) / 2, height - 2*inch)
+                p.drawImage(image_reader(self.organization_logo.path), (width - 2*inch) / 2, height - 2*inch,
+                            width=2*inch, height=1*inch, mask='auto')
                 y_position = height - 2.5*inch
             except:
                 y_position = height - 2*inch
@@ -223,8 +227,8 @@ class Certificate(models.Model):
         # Add signatory name and title
         if self.signature and os.path.exists(self.signature.path):
             try:
-                signature = Image(self.signature.path, width=1.5*inch, height=0.5*inch)
-                signature.drawOn(p, (width - signature.drawWidth) / 2, y_position - 0.7*inch)
+                p.drawImage(image_reader(self.signature.path), (width - 1.5*inch) / 2, y_position - 0.7*inch,
+                            width=1.5*inch, height=0.5*inch, mask='auto')
                 y_position -= 0.8*inch
             except:
                 pass
@@ -251,7 +255,14 @@ class Certificate(models.Model):
         # FileResponse sets the Content-Disposition header so that browsers
         # present the option to save the file.
         buffer.seek(0)
-        
+        return buffer
+
+    def generate_pdf_certificate(self):
+        """Generate a PDF certificate for this record."""
+        from django.core.files import File
+
+        buffer = self.render_pdf()
+
         # Save the PDF to the model
         filename = f"certificate_{self.certificate_number}.pdf"
         self.pdf_file.save(filename, File(buffer), save=False)
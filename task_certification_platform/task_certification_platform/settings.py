@@ -184,6 +184,9 @@ SITE_NAME = 'Task Certification Platform'
 SITE_DOMAIN = 'localhost:8000'
 SITE_URL = 'http://localhost:8000'
 
+# Optional TrueType font (.ttf path) for certificate headings; None keeps Helvetica
+CERTIFICATE_FONT = None
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
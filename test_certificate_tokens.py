@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Sign certificate tokens, rotate the signing key, and revoke certificates.
+Tokens from a retired key keep verifying while it stays listed, tampered or
+unknown-key tokens are rejected, and revocation is answered from the
+in-memory set: at once for this process, after a refresh for revocations
+saved elsewhere, and without a query either way. Runs against a throwaway
+test database.
+"""
+
+
+def main() -> None:
+    import os
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+
+    from django.db import connection
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        from restapi.certificate_signing import InvalidToken, sign_claims, verify_token
+        from restapi.models import Certificate, CustomUser, Exam, Mentor
+        from restapi.verification import is_revoked, lookup_certificate, revocations, revoke_certificates
+
+        mentor = Mentor.objects.create(name='Token Mentor', email='token@example.com')
+        exam = Exam.objects.create(name='Token Exam', created_by=mentor, duration_minutes=30, pass_score=50)
+        user = CustomUser.objects.create_user(username='holder', password='token-password')
+        certificate = Certificate.objects.create(user=user, exam=exam, certificate_number='CERT-TOKEN-1', score=90)
+        other = Certificate.objects.create(user=user, exam=exam, certificate_number='CERT-TOKEN-2', score=80)
+
+        def check(token):
+            return Client().get('/api/verify-certificate-token/', {'token': token})
+
+        # Key rotation: the old key keeps verifying while it is still listed
+        with override_settings(CERTIFICATE_SIGNING_KEYS={'k1': 'first-secret'}, CERTIFICATE_SIGNING_KEY_ID='k1'):
+            old_token = sign_claims('CERT-TOKEN-1', 'Holder', 'Token Exam', 90, certificate.issued_date.date())
+        with override_settings(
+            CERTIFICATE_SIGNING_KEYS={'k1': 'first-secret', 'k2': 'second-secret'}, CERTIFICATE_SIGNING_KEY_ID='k2',
+        ):
+            new_token = sign_claims('CERT-TOKEN-2', 'Holder', 'Token Exam', 80, other.issued_date.date())
+            assert verify_token(old_token)['key_id'] == 'k1'
+            assert verify_token(new_token)['key_id'] == 'k2'
+            assert verify_token(new_token)['number'] == 'CERT-TOKEN-2'
+            # Copied off a PDF, broken over lines
+            assert verify_token(old_token[:20] + '\n  ' + old_token[20:])['number'] == 'CERT-TOKEN-1'
+
+            key_id, body, mac = new_token.split('.')
+            for bad in (f"k1.{body}.{mac}", f"{key_id}.{body}x.{mac}", 'not-a-token', ''):
+                try:
+                    verify_token(bad)
+                except InvalidToken:
+                    pass
+                else:
+                    raise AssertionError(f'{bad!r} verified')
+
+            response = check(old_token)
+            print(f"old key after rotation: {response.status_code} {response.json()}")
+            assert response.status_code == 200 and response.json()['valid'] is True
+
+        with override_settings(CERTIFICATE_SIGNING_KEYS={'k2': 'second-secret'}, CERTIFICATE_SIGNING_KEY_ID='k2'):
+            response = check(old_token)
+            print(f"old key once retired: {response.status_code} {response.json()}")
+            assert response.status_code == 400 and response.json()['error'] == 'Unknown signing key.'
+
+        with override_settings(
+            CERTIFICATE_SIGNING_KEYS={'k1': 'first-secret', 'k2': 'second-secret'}, CERTIFICATE_SIGNING_KEY_ID='k2',
+        ):
+            # Warm the set, then a check is pure CPU
+            assert not is_revoked('CERT-TOKEN-1')
+            with CaptureQueriesContext(connection) as ctx:
+                assert check(old_token).json()['valid'] is True
+            print(f"token check: {len(ctx.captured_queries)} queries")
+            assert not ctx.captured_queries
+
+            # Revoked in this process: applies at once
+            assert revoke_certificates(Certificate.objects.filter(pk=certificate.pk)) == 1
+            with CaptureQueriesContext(connection) as ctx:
+                body = check(old_token).json()
+            assert body['valid'] is False and body['revoked'] is True
+            assert not ctx.captured_queries
+
+            # Revoked by another process (no signals reach this one): applies on the next refresh
+            Certificate.objects.filter(pk=other.pk).update(revoked=True)
+            assert check(new_token).json()['valid'] is True, 'refreshed before REVOCATION_REFRESH elapsed'
+            refresh, revocations.refresh = revocations.refresh, 0
+            try:
+                assert check(new_token).json()['revoked'] is True
+                # Un-revoked elsewhere: the version stamp changes too
+                Certificate.objects.filter(pk__in=[certificate.pk, other.pk]).update(revoked=False, revoked_at=None)
+                assert not is_revoked('CERT-TOKEN-1') and not is_revoked('cert-token-2')
+            finally:
+                revocations.refresh = refresh
+
+            # Saved through the model, the signal updates the set
+            certificate.revoked = True
+            certificate.save()
+            assert is_revoked(' cert-token-1 ')
+
+        # A cached lookup takes its revoked flag from the same set, so a hit runs no query
+        assert lookup_certificate('CERT-TOKEN-2').revoked is False
+        revocations.add('CERT-TOKEN-2')
+        with CaptureQueriesContext(connection) as ctx:
+            hit = lookup_certificate('cert-token-2')
+        print(f"cached lookup: {len(ctx.captured_queries)} queries, revoked={hit.revoked}")
+        assert hit.revoked is True and not ctx.captured_queries
+
+        print("OK: tokens verify across key rotation and revocation is answered without a query")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
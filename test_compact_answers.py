@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Store exam answers plain, convert them with `manage.py compact_answers`,
+then edit and reorder the questions' options. Compact answers must decode
+to exactly what was submitted through their stored options snapshot, not
+the live options, and converting again or back must be lossless. Runs
+against a throwaway test database.
+"""
+
+
+def main() -> None:
+    import io
+    import os
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        from restapi.answer_codec import decode_answers, encode_answers, is_compact, options_snapshot
+        from restapi.models import AnswerOptionSnapshot, CustomUser, Exam, ExamAttempt, Mentor, Question
+        from restapi.question_pack import attempt_answers, question_order_for
+
+        # The codec alone: decoding against the snapshot survives an edit, the live options do not
+        before = {1: ['A', 'B', 'C'], 2: ['X', 'Y'], 3: []}
+        after = {1: ['C', 'B', 'A'], 2: ['X', 'Y', 'Z'], 3: []}
+        answers = {'1': 'C', '2': 'Y', '3': 'free text', '99': 'orphan'}
+        stored = encode_answers(answers, [2, 1, 3], before)
+        snapshot = options_snapshot([2, 1, 3], before)
+        assert decode_answers(stored, [2, 1, 3], {int(k): v for k, v in snapshot.items()}) == answers
+        assert decode_answers(stored, [2, 1, 3], after)['1'] == 'A', 'reordered options should break live decoding'
+
+        mentor = Mentor.objects.create(name='Codec Mentor', email='codec@example.com')
+        exam = Exam.objects.create(name='Codec Exam', created_by=mentor, duration_minutes=30, pass_score=50, max_attempts=0)
+        questions = [
+            Question.objects.create(
+                exam=exam, question_text=f'Question {i}', question_type='multiple_choice',
+                options=['A', 'B', 'C', 'D'], correct_answer='A',
+            )
+            for i in range(4)
+        ]
+        questions.append(Question.objects.create(
+            exam=exam, question_text='Short', question_type='short_answer', options=[], correct_answer='yes',
+        ))
+        user = CustomUser.objects.create_user(username='codec', password='codec-password')
+        client = Client()
+        client.force_login(user)
+
+        def sit(answers):
+            attempt_id = client.post(
+                '/api/results/start_exam/', {'exam_id': exam.id}, content_type='application/json'
+            ).json()['attempt_id']
+            response = client.post(
+                '/api/results/submit_exam/', {'attempt_id': attempt_id, 'answers': answers},
+                content_type='application/json',
+            )
+            assert response.status_code == 200, response.content
+            return ExamAttempt.objects.get(pk=attempt_id)
+
+        submitted = {str(q.id): answer for q, answer in zip(questions, ['A', 'D', 'B', 'C', 'yes'])}
+        with override_settings(EXAM_COMPACT_ANSWERS=False):
+            plain = sit(submitted)
+        assert not is_compact(plain.answers)
+
+        out = io.StringIO()
+        call_command('compact_answers', '--all', stdout=out)
+        print(out.getvalue().strip())
+        plain.refresh_from_db()
+        assert is_compact(plain.answers) and plain.answers.get('s')
+        assert AnswerOptionSnapshot.objects.filter(digest=plain.answers['s']).exists()
+        assert attempt_answers(plain) == submitted
+        assert question_order_for(plain)
+
+        # Re-running converts nothing
+        out = io.StringIO()
+        call_command('compact_answers', '--exam', str(exam.id), stdout=out)
+        assert '0 attempts rewritten' in out.getvalue()
+
+        # Options edited and reordered after the answers were encoded
+        for question in questions[:4]:
+            question.options = ['D', 'C', 'B', 'A', 'E']
+            question.save()
+        plain.refresh_from_db()
+        decoded = attempt_answers(plain)
+        print(f"after the options changed: {decoded == submitted}")
+        assert decoded == submitted
+
+        # Submitted compact after the edit, against the new options
+        compact = sit(submitted)
+        assert is_compact(compact.answers) and compact.answers['s'] != plain.answers['s']
+        assert attempt_answers(compact) == submitted
+
+        # And back to plain, losslessly
+        call_command('compact_answers', '--all', '--expand', stdout=io.StringIO())
+        for attempt in (plain, compact):
+            attempt.refresh_from_db()
+            assert attempt.answers == submitted, attempt.answers
+
+        print("OK: compact answers decode through their snapshot and convert both ways")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
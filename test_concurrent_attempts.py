@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Race several submits of one attempt, and several starts of one exam, from
+threads released at the same instant. Exactly one submit may grade the
+attempt and award points, and concurrent starts must converge on a single
+attempt. Runs against a throwaway test database.
+"""
+
+THREADS = 8
+
+
+def main() -> None:
+    import os
+    import threading
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+
+    from django.db import connection
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+    if connection.vendor == 'sqlite':
+        # Threads need a real file; the shared in-memory database locks whole tables
+        connection.settings_dict['TEST']['NAME'] = 'test_concurrent_attempts.sqlite3'
+        connection.settings_dict['OPTIONS'].setdefault('timeout', 30)
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        from restapi.models import (
+            Certificate, CustomUser, Exam, ExamAttempt, ExamAttemptStats, Mentor, Question, Result,
+        )
+        from restapi.jobs import run_pending_jobs
+
+        mentor = Mentor.objects.create(name='Race Mentor', email='race@example.com')
+        exam = Exam.objects.create(name='Race Exam', created_by=mentor, duration_minutes=30, pass_score=50, max_attempts=0)
+        questions = [
+            Question.objects.create(
+                exam=exam, question_text=f'Question {i}', question_type='multiple_choice',
+                options=['A', 'B', 'C', 'D'], correct_answer='A',
+            )
+            for i in range(5)
+        ]
+        user = CustomUser.objects.create_user(username='racer', password='race-password')
+
+        def run_together(fn):
+            barrier = threading.Barrier(THREADS)
+            results = [None] * THREADS
+
+            def worker(i):
+                client = Client()
+                client.force_login(user)
+                barrier.wait()
+                try:
+                    results[i] = fn(client)
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            return results
+
+        # Concurrent starts: one attempt, everyone gets it back
+        starts = run_together(lambda c: c.post(
+            '/api/results/start_exam/', {'exam_id': exam.id}, content_type='application/json'
+        ))
+        codes = sorted(r.status_code for r in starts)
+        attempt_ids = {r.json()['attempt_id'] for r in starts if r.status_code == 200}
+        print(f"start_exam x{THREADS}: status codes {codes}, attempt ids {sorted(attempt_ids)}")
+        assert codes == [200] * THREADS, 'a concurrent start failed'
+        assert len(attempt_ids) == 1, 'concurrent starts created more than one attempt'
+        assert ExamAttempt.objects.filter(user=user, exam=exam).count() == 1
+
+        # Concurrent submits: exactly one grades the attempt
+        attempt_id = attempt_ids.pop()
+        answers = {str(q.id): 'A' for q in questions}
+        points_before = CustomUser.objects.get(pk=user.pk).points
+        submits = run_together(lambda c: c.post(
+            '/api/results/submit_exam/', {'attempt_id': attempt_id, 'answers': answers},
+            content_type='application/json',
+        ))
+        codes = sorted(r.status_code for r in submits)
+        print(f"submit_exam x{THREADS}: status codes {codes}")
+        assert codes.count(200) == 1, 'expected exactly one winning submit'
+        assert codes.count(400) == THREADS - 1
+
+        # Certificate and points are jobs; with JOBS_ALWAYS_EAGER=False they wait here for a worker
+        while any(run_pending_jobs()):
+            pass
+
+        stats = ExamAttemptStats.objects.get(user=user, exam=exam)
+        points_gained = CustomUser.objects.get(pk=user.pk).points - points_before
+        print(
+            f"attempts_used={stats.attempts_used}, results={Result.objects.filter(user=user, exam=exam).count()}, "
+            f"certificates={Certificate.objects.filter(user=user, exam=exam).count()}, points gained={points_gained}"
+        )
+        assert stats.attempts_used == 1
+        assert Certificate.objects.filter(user=user, exam=exam).count() == 1
+        assert points_gained == 50, 'points were awarded more or less than once'
+
+        # The state flip is one conditional UPDATE, same as the save() it replaced
+        client = Client()
+        client.force_login(user)
+        attempt_id = client.post(
+            '/api/results/start_exam/', {'exam_id': exam.id}, content_type='application/json'
+        ).json()['attempt_id']
+        with CaptureQueriesContext(connection) as ctx:
+            client.post(
+                '/api/results/submit_exam/', {'attempt_id': attempt_id, 'answers': answers},
+                content_type='application/json',
+            )
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "restapi_examattempt"')]
+        print(f"sequential submit: {len(ctx.captured_queries)} queries, {len(updates)} attempt UPDATE")
+        assert len(updates) == 1 and '"status" = ' in updates[0].split('WHERE', 1)[1]
+
+        print("OK: exactly one submit won and concurrent starts shared one attempt")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
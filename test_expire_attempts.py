@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Sweep overdue attempts with `expire_overdue_attempts`. Claiming and grading
+commit together: a sweep that dies mid-grade must leave every attempt it
+claimed in progress with its autosaved answers, and the next sweep must
+expire, grade and reward each of them exactly once. Attempts that are not
+overdue or were already submitted are left alone. Runs against a throwaway
+test database.
+"""
+
+STUDENTS = 5
+
+
+def main() -> None:
+    import io
+    import os
+    from datetime import timedelta
+    from unittest import mock
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+    from django.utils import timezone
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        from restapi.autosave import buffered_answers
+        from restapi.expiry import expire_overdue_attempts
+        from restapi.jobs import run_pending_jobs
+        from restapi.models import Certificate, CustomUser, Exam, ExamAttempt, Mentor, Question, Result
+
+        mentor = Mentor.objects.create(name='Sweep Mentor', email='sweep@example.com')
+        exam = Exam.objects.create(name='Sweep Exam', created_by=mentor, duration_minutes=30, pass_score=50, max_attempts=0)
+        for i in range(4):
+            Question.objects.create(
+                exam=exam, question_text=f'Question {i}', question_type='multiple_choice',
+                options=['A', 'B', 'C', 'D'], correct_answer='A',
+            )
+
+        # Each student answers i of the four questions correctly before running out of time
+        attempts = {}
+        clients = {}
+        for i in range(STUDENTS):
+            user = CustomUser.objects.create_user(username=f'sweeper{i}', password='sweep-password')
+            client = clients[user.id] = Client()
+            client.force_login(user)
+            body = client.post('/api/results/start_exam/', {'exam_id': exam.id}, content_type='application/json').json()
+            answers = {str(q['id']): 'A' if n < i else 'B' for n, q in enumerate(body['questions'])}
+            response = client.patch(
+                '/api/results/autosave/', {'attempt_id': body['attempt_id'], 'answers': answers},
+                content_type='application/json',
+            )
+            assert response.status_code == 200, response.content
+            attempts[body['attempt_id']] = i * 25
+
+        overdue = list(attempts)[:-1]
+        still_running = list(attempts)[-1]
+        ExamAttempt.objects.filter(pk__in=overdue).update(expires_at=timezone.now() - timedelta(minutes=1))
+        # Submitted before the sweep; its own submit already graded it
+        submitted = overdue.pop()
+        owner = ExamAttempt.objects.get(pk=submitted).user_id
+        assert clients[owner].post(
+            '/api/results/submit_exam/', {'attempt_id': submitted, 'answers': {}}, content_type='application/json',
+        ).status_code == 200
+        submitted_score = ExamAttempt.objects.get(pk=submitted).score
+
+        # Dies after claiming and grading part of the work: nothing may stick
+        with mock.patch('restapi.expiry.bulk_upsert_results', side_effect=RuntimeError('sweep died')):
+            try:
+                expire_overdue_attempts(chunk_size=2)
+            except RuntimeError:
+                pass
+        statuses = sorted(ExamAttempt.objects.filter(pk__in=overdue).values_list('status', flat=True))
+        print(f"after a crashed sweep: {statuses}")
+        assert statuses == ['in_progress'] * len(overdue)
+        assert not ExamAttempt.objects.filter(pk__in=overdue, submitted_at__isnull=False).exists()
+        assert all(buffered_answers(pk) for pk in overdue), 'a rolled-back sweep dropped autosaved answers'
+
+        expired = expire_overdue_attempts(chunk_size=2)
+        while any(run_pending_jobs()):
+            pass
+        print(f"sweep: expired and graded {expired}")
+        assert expired == len(overdue)
+        for attempt in ExamAttempt.objects.filter(pk__in=overdue):
+            assert attempt.status == 'expired' and attempt.submitted_at is not None
+            assert attempt.score == attempts[attempt.pk], (attempt.pk, attempt.score)
+            assert attempt.passed == (attempt.score >= 50)
+            assert buffered_answers(attempt.pk) is None
+            result = Result.objects.get(user_id=attempt.user_id, exam=exam)
+            assert result.score == attempt.score and result.passed == attempt.passed
+            certificates = Certificate.objects.filter(user_id=attempt.user_id, exam=exam).count()
+            points = CustomUser.objects.get(pk=attempt.user_id).points
+            assert (certificates, points) == ((1, 50) if attempt.passed else (0, 0)), (attempt.pk, certificates, points)
+
+        assert ExamAttempt.objects.get(pk=still_running).status == 'in_progress'
+        assert ExamAttempt.objects.get(pk=submitted).score == submitted_score
+
+        out = io.StringIO()
+        call_command('expire_attempts', stdout=out)
+        print(out.getvalue().strip())
+        assert out.getvalue().strip() == 'Expired and graded 0 attempts.'
+
+        print("OK: a crashed sweep left its attempts in progress and the next graded each once")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
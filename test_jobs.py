@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Drive the background job queue through failures. A failing job rolls back
+its handler's writes, waits out its backoff and is retried until it
+succeeds or, after max_attempts, is dead-lettered with its last traceback.
+A job left running by a dead worker is reclaimed, and an eager job that
+fails in the request is queued for the worker instead. Runs against a
+throwaway test database.
+"""
+
+
+def main() -> None:
+    import os
+    from datetime import timedelta
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+
+    from django.db import transaction
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+    from django.utils import timezone
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        from restapi.jobs import (
+            LOCK_TIMEOUT, claim_jobs, enqueue, job, purge_jobs, run_job, run_pending_jobs,
+        )
+        from restapi.models import CustomUser, Job, UserActivityLog
+
+        user = CustomUser.objects.create_user(username='worker', password='worker-password')
+        calls = {'flaky': 0, 'broken': 0}
+
+        @job('test_flaky')
+        def flaky(user_id, fail_times):
+            calls['flaky'] += 1
+            UserActivityLog.objects.create(user_id=user_id, activity_type='login', details=f"call {calls['flaky']}")
+            if calls['flaky'] <= fail_times:
+                raise RuntimeError(f"flaky failure {calls['flaky']}")
+
+        @job('test_broken')
+        def broken():
+            calls['broken'] += 1
+            raise RuntimeError('always broken')
+
+        def make_due(pk):
+            Job.objects.filter(pk=pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+        with override_settings(JOBS_ALWAYS_EAGER=False):
+            try:
+                enqueue('no_such_job')
+            except LookupError:
+                pass
+            else:
+                raise AssertionError('enqueued a job with no handler')
+
+            # Fails twice, then succeeds on the third attempt
+            flaky_job = enqueue('test_flaky', max_attempts=3, user_id=user.id, fail_times=2)
+            for attempt in (1, 2):
+                assert run_pending_jobs() == (0, 1)
+                flaky_job.refresh_from_db()
+                print(f"flaky attempt {attempt}: {flaky_job.status}, retry in "
+                      f"{(flaky_job.run_after - timezone.now()).total_seconds():.0f}s")
+                assert flaky_job.status == 'queued' and flaky_job.attempts == attempt
+                assert f'flaky failure {attempt}' in flaky_job.last_error
+                assert flaky_job.run_after > timezone.now(), 'a failed job was not backed off'
+                assert not UserActivityLog.objects.filter(user=user).exists(), 'a failed handler kept its writes'
+                # Not due until the backoff has passed
+                assert run_pending_jobs() == (0, 0)
+                make_due(flaky_job.pk)
+            assert run_pending_jobs() == (1, 0)
+            flaky_job.refresh_from_db()
+            assert flaky_job.status == 'done' and flaky_job.attempts == 3 and flaky_job.last_error == ''
+            assert list(UserActivityLog.objects.filter(user=user).values_list('details', flat=True)) == ['call 3']
+
+            # Never succeeds: dead after max_attempts, and never claimed again
+            broken_job = enqueue('test_broken', max_attempts=2)
+            assert run_pending_jobs() == (0, 1)
+            make_due(broken_job.pk)
+            assert run_pending_jobs() == (0, 1)
+            broken_job.refresh_from_db()
+            print(f"broken job: {broken_job.status} after {broken_job.attempts} attempts")
+            assert broken_job.status == 'dead' and broken_job.attempts == 2
+            assert 'RuntimeError: always broken' in broken_job.last_error
+            make_due(broken_job.pk)
+            assert run_pending_jobs() == (0, 0) and calls['broken'] == 2
+
+            # Claimed by a worker that died: reclaimed once the lock times out
+            stuck = enqueue('test_flaky', user_id=user.id, fail_times=0)
+            [claimed] = claim_jobs()
+            assert claim_jobs() == [], 'a running job was claimed twice'
+            Job.objects.filter(pk=stuck.pk).update(locked_at=timezone.now() - timedelta(seconds=LOCK_TIMEOUT + 1))
+            [reclaimed] = claim_jobs()
+            assert reclaimed.pk == stuck.pk and reclaimed.attempts == 2
+            # The original worker wakes up late; its result is discarded in favour of the reclaim
+            assert run_job(claimed) is False
+            assert run_job(reclaimed) is True
+            assert Job.objects.get(pk=stuck.pk).status == 'done'
+
+            # Done jobs are purged, dead ones are kept for inspection
+            assert purge_jobs(timezone.now() + timedelta(seconds=1)) == 2
+            assert list(Job.objects.values_list('status', flat=True)) == ['dead']
+
+        # Eager: runs once the request commits, and a failure there becomes a queued retry
+        with override_settings(JOBS_ALWAYS_EAGER=True):
+            with transaction.atomic():
+                assert enqueue('test_broken', max_attempts=4) is None
+                assert calls['broken'] == 2, 'an eager job ran before its transaction committed'
+            assert calls['broken'] == 3
+            retry = Job.objects.get(name='test_broken', status='queued')
+            print(f"eager failure queued: attempts={retry.attempts}, max_attempts={retry.max_attempts}")
+            assert retry.attempts == 1 and retry.max_attempts == 4 and retry.run_after > timezone.now()
+
+            before = calls['flaky']
+            with transaction.atomic():
+                enqueue('test_flaky', user_id=user.id, fail_times=0)
+                transaction.set_rollback(True)
+            assert calls['flaky'] == before, 'a rolled-back request ran its job'
+
+        print("OK: failed jobs were retried with backoff and dead-lettered after max_attempts")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
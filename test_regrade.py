@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Fix a wrong correct_answer after students have sat an exam, then run
+`manage.py regrade_attempts`. Every attempt is rescored from its stored
+answers, each Result is re-synced to the student's latest attempt,
+certificates are issued, rescored or flagged to match, item statistics
+are recounted, and no points are awarded twice. A second run changes
+nothing. Runs against a throwaway test database.
+"""
+
+
+def main() -> None:
+    import io
+    import os
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        from restapi.jobs import run_pending_jobs
+        from restapi.models import Certificate, CustomUser, Exam, ExamAttempt, Mentor, Question, QuestionStats, Result
+        from restapi.regrade import regrade_exam
+
+        mentor = Mentor.objects.create(name='Regrade Mentor', email='regrade@example.com')
+        exam = Exam.objects.create(name='Regrade Exam', created_by=mentor, duration_minutes=30, pass_score=50, max_attempts=0)
+        questions = [
+            Question.objects.create(
+                exam=exam, question_text=f'Question {i}', question_type='multiple_choice',
+                options=['A', 'B', 'C', 'D'], correct_answer='A',
+            )
+            for i in range(4)
+        ]
+
+        def sit(user, picks):
+            client = Client()
+            client.force_login(user)
+            attempt_id = client.post(
+                '/api/results/start_exam/', {'exam_id': exam.id}, content_type='application/json'
+            ).json()['attempt_id']
+            answers = {str(q.id): pick for q, pick in zip(questions, picks)}
+            response = client.post(
+                '/api/results/submit_exam/', {'attempt_id': attempt_id, 'answers': answers},
+                content_type='application/json',
+            )
+            assert response.status_code == 200, response.content
+            return attempt_id
+
+        # Scores before and after questions 2 and 3 are keyed 'B' instead of 'A'
+        students = {
+            'rises_to_pass': (['BBBB'], 0, 50),
+            'retook': (['BBBB', 'AABB'], 50, 100),
+            'still_passes': (['AAAA'], 100, 50),
+            'drops_to_fail': (['ABAA'], 75, 25),
+        }
+        users = {}
+        latest = {}
+        for username, (sittings, before, after) in students.items():
+            user = users[username] = CustomUser.objects.create_user(username=username, password='regrade-password')
+            for picks in sittings:
+                latest[username] = sit(user, picks)
+        while any(run_pending_jobs()):
+            pass
+        points_before = {name: CustomUser.objects.get(pk=u.pk).points for name, u in users.items()}
+        for username, (_, before, _) in students.items():
+            assert Result.objects.get(user=users[username], exam=exam).score == before
+
+        for question in questions[2:]:
+            question.correct_answer = 'B'
+            question.save()
+
+        out = io.StringIO()
+        call_command('regrade_attempts', '--question', str(questions[2].id), '--chunk-size', '2', stdout=out)
+        print(out.getvalue().strip())
+        while any(run_pending_jobs()):
+            pass
+
+        for username, (sittings, before, after) in students.items():
+            user = users[username]
+            attempt = ExamAttempt.objects.get(pk=latest[username])
+            result = Result.objects.get(user=user, exam=exam)
+            certificate = Certificate.objects.filter(user=user, exam=exam).first()
+            print(f"{username}: {before} -> {attempt.score}, result {result.score} passed={result.passed}, "
+                  f"certificate={'none' if certificate is None else (certificate.score, certificate.flagged)}")
+            assert attempt.score == after and attempt.passed == (after >= 50)
+            assert result.score == after and result.passed == attempt.passed, 'Result not re-synced to the latest attempt'
+            if after >= 50:
+                assert certificate is not None and not certificate.flagged and certificate.score == after
+            else:
+                assert certificate is not None and certificate.flagged, 'a failing regrade did not flag the certificate'
+            assert CustomUser.objects.get(pk=user.pk).points == points_before[username], 'points re-awarded'
+
+        first = ExamAttempt.objects.filter(user=users['retook'], exam=exam).order_by('pk').first()
+        assert first.score == 50, 'an earlier attempt was not regraded'
+
+        # Item statistics follow the new key
+        stats = QuestionStats.objects.get(question=questions[2])
+        picked_b = sum(picks[2] == 'B' for sittings, _, _ in students.values() for picks in sittings)
+        assert stats.times_correct == picked_b, (stats.times_correct, picked_b)
+
+        again = regrade_exam(Exam.objects.get(pk=exam.id))
+        print(f"second run: {again}")
+        assert again.attempts_changed == 0 and again.results_changed == 0
+        assert again.certificates_issued == 0 and again.certificates_flagged == 0
+
+        print("OK: regrade rescored every attempt and re-synced results and certificates")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()